@@ -0,0 +1,47 @@
+"""versi set soal dan cap versi pada jawaban_pengguna
+
+Revision ID: a1c4e7f20b31
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e7f20b31'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'versi_soal',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('jumlah_soal', sa.Integer(), nullable=False),
+        sa.Column('dibuat_pada', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # Versi awal mencerminkan set soal yang sudah ada
+    op.execute(
+        "INSERT INTO versi_soal (jumlah_soal, dibuat_pada) "
+        "SELECT COUNT(*), CURRENT_TIMESTAMP FROM soal"
+    )
+    with op.batch_alter_table('jawaban_pengguna') as batch_op:
+        batch_op.add_column(sa.Column('versi_soal', sa.Integer(), nullable=True, comment='Versi set soal yang dijawab'))
+        batch_op.create_index('ix_jawaban_pengguna_versi_soal', ['versi_soal'], unique=False)
+        batch_op.create_foreign_key('fk_jawaban_pengguna_versi_soal', 'versi_soal', ['versi_soal'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('jawaban_pengguna') as batch_op:
+        batch_op.drop_constraint('fk_jawaban_pengguna_versi_soal', type_='foreignkey')
+        batch_op.drop_index('ix_jawaban_pengguna_versi_soal')
+        batch_op.drop_column('versi_soal')
+    op.drop_table('versi_soal')
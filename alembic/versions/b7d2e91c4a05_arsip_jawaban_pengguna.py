@@ -0,0 +1,40 @@
+"""tabel arsip jawaban_pengguna terkompresi
+
+Revision ID: b7d2e91c4a05
+Revises: a1c4e7f20b31
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e91c4a05'
+down_revision: Union[str, None] = 'a1c4e7f20b31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'arsip_jawaban_pengguna',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('id_pengguna', sa.Integer(), nullable=False),
+        sa.Column('jawaban_zlib', sa.LargeBinary(), nullable=False, comment='JSON jawaban terkompresi zlib'),
+        sa.Column('versi_soal', sa.Integer(), nullable=True),
+        sa.Column('dijawab_pada', sa.DateTime(), nullable=True),
+        sa.Column('diarsipkan_pada', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['id_pengguna'], ['pengguna.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_arsip_jawaban_pengguna_id_pengguna', 'arsip_jawaban_pengguna', ['id_pengguna'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_arsip_jawaban_pengguna_id_pengguna', table_name='arsip_jawaban_pengguna')
+    op.drop_table('arsip_jawaban_pengguna')
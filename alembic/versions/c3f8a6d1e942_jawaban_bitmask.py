@@ -0,0 +1,115 @@
+"""jawaban_pengguna dalam bentuk bitmask
+
+Revision ID: c3f8a6d1e942
+Revises: b7d2e91c4a05
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a6d1e942'
+down_revision: Union[str, None] = 'b7d2e91c4a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+# Salinan encoder saat migrasi ini ditulis; jangan impor dari app agar
+# perubahan encoder di kemudian hari tidak mengubah migrasi historis.
+def encode_jawaban(jawaban):
+    bits = 0
+    seen = set()
+    for item in jawaban:
+        id_soal, pilihan = item.get('id_soal'), str(item.get('pilihan', '')).upper()
+        if not isinstance(id_soal, int) or id_soal < 1 or id_soal in seen or pilihan not in ('A', 'B'):
+            return None
+        seen.add(id_soal)
+        if pilihan == 'A':
+            bits |= 1 << (id_soal - 1)
+    # Bit ke-63 adalah bit tanda BIGINT
+    if len(seen) > 63 or seen != set(range(1, len(seen) + 1)):
+        return None
+    return bits, len(seen)
+
+
+def decode_jawaban(bits, jumlah):
+    return [
+        {'id_soal': i, 'pilihan': 'A' if bits >> (i - 1) & 1 else 'B'}
+        for i in range(1, jumlah + 1)
+    ]
+
+jawaban_pengguna = sa.table(
+    'jawaban_pengguna',
+    sa.column('id', sa.Integer),
+    sa.column('jawaban', sa.JSON),
+    sa.column('jawaban_bit', sa.BigInteger),
+    sa.column('jumlah_jawaban', sa.SmallInteger),
+)
+
+
+def _batches(conn, where):
+    """Keyset per BATCH_SIZE baris agar backfill tidak mengunci seluruh tabel."""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(jawaban_pengguna)
+            .where(jawaban_pengguna.c.id > last_id, where)
+            .order_by(jawaban_pengguna.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('jawaban_pengguna') as batch_op:
+        batch_op.add_column(sa.Column('jawaban_bit', sa.BigInteger(), nullable=True, comment='Bit ke-(id_soal-1) = 1 bila memilih A'))
+        batch_op.add_column(sa.Column('jumlah_jawaban', sa.SmallInteger(), nullable=True))
+        batch_op.alter_column('jawaban', existing_type=sa.JSON(), nullable=True)
+
+    conn = op.get_bind()
+    update = (
+        jawaban_pengguna.update()
+        .where(jawaban_pengguna.c.id == sa.bindparam('_id'))
+        .values(jawaban_bit=sa.bindparam('_bit'), jumlah_jawaban=sa.bindparam('_jumlah'), jawaban=sa.null())
+    )
+    for rows in _batches(conn, jawaban_pengguna.c.jawaban_bit.is_(None)):
+        params = []
+        for row in rows:
+            jawaban = json.loads(row.jawaban) if isinstance(row.jawaban, str) else row.jawaban
+            encoded = encode_jawaban(jawaban or [])
+            # Baris yang tidak bisa di-encode tetap disimpan sebagai JSON
+            if encoded:
+                params.append({'_id': row.id, '_bit': encoded[0], '_jumlah': encoded[1]})
+        if params:
+            conn.execute(update, params)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    update = (
+        jawaban_pengguna.update()
+        .where(jawaban_pengguna.c.id == sa.bindparam('_id'))
+        .values(jawaban=sa.bindparam('_jawaban', type_=sa.JSON))
+    )
+    for rows in _batches(conn, jawaban_pengguna.c.jawaban_bit.isnot(None)):
+        conn.execute(update, [
+            {'_id': row.id, '_jawaban': decode_jawaban(row.jawaban_bit, row.jumlah_jawaban)}
+            for row in rows
+        ])
+
+    with op.batch_alter_table('jawaban_pengguna') as batch_op:
+        batch_op.alter_column('jawaban', existing_type=sa.JSON(), nullable=False)
+        batch_op.drop_column('jumlah_jawaban')
+        batch_op.drop_column('jawaban_bit')
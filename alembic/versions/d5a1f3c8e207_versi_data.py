@@ -0,0 +1,34 @@
+"""penghitung versi data per entitas untuk ETag
+
+Revision ID: d5a1f3c8e207
+Revises: c3f8a6d1e942
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a1f3c8e207'
+down_revision: Union[str, None] = 'c3f8a6d1e942'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tabel kosong: kunci yang belum ada dianggap versi 0
+    op.create_table(
+        'versi_data',
+        sa.Column('kunci', sa.String(length=64), nullable=False),
+        sa.Column('versi', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('kunci')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('versi_data')
@@ -0,0 +1,43 @@
+"""tabel outbox_job untuk pekerjaan lanjutan setelah submit
+
+Revision ID: e8b4c2d6f319
+Revises: d5a1f3c8e207
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4c2d6f319'
+down_revision: Union[str, None] = 'd5a1f3c8e207'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'outbox_job',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('jenis', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('percobaan', sa.Integer(), nullable=False),
+        sa.Column('jadwal', sa.DateTime(), nullable=False),
+        sa.Column('token_klaim', sa.String(length=32), nullable=True),
+        sa.Column('error_terakhir', sa.Text(), nullable=True),
+        sa.Column('dibuat_pada', sa.DateTime(), nullable=True),
+        sa.Column('selesai_pada', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_job_status_jadwal', 'outbox_job', ['status', 'jadwal'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_job_status_jadwal', table_name='outbox_job')
+    op.drop_table('outbox_job')
@@ -0,0 +1,67 @@
+"""arsip_jawaban_pengguna memakai primary key sendiri
+
+Revision ID: f2a7c5e9b184
+Revises: e8b4c2d6f319
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c5e9b184'
+down_revision: Union[str, None] = 'e8b4c2d6f319'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KOLOM_DATA = "id_pengguna, jawaban_zlib, versi_soal, dijawab_pada, diarsipkan_pada"
+
+
+def _buat_tabel(nama: str, id_sendiri: bool) -> None:
+    kolom = [sa.Column('id', sa.Integer(), autoincrement=id_sendiri, nullable=False)]
+    if id_sendiri:
+        kolom.append(sa.Column('id_jawaban_asal', sa.Integer(), nullable=False, comment='id asli di jawaban_pengguna'))
+    op.create_table(
+        nama,
+        *kolom,
+        sa.Column('id_pengguna', sa.Integer(), nullable=False),
+        sa.Column('jawaban_zlib', sa.LargeBinary(), nullable=False, comment='JSON jawaban terkompresi zlib'),
+        sa.Column('versi_soal', sa.Integer(), nullable=True),
+        sa.Column('dijawab_pada', sa.DateTime(), nullable=True),
+        sa.Column('diarsipkan_pada', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['id_pengguna'], ['pengguna.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tabel dibuat ulang (bukan ALTER) agar sama di MySQL dan SQLite
+    _buat_tabel('arsip_jawaban_pengguna_baru', id_sendiri=True)
+    op.execute(
+        f"INSERT INTO arsip_jawaban_pengguna_baru (id_jawaban_asal, {KOLOM_DATA}) "
+        f"SELECT id, {KOLOM_DATA} FROM arsip_jawaban_pengguna ORDER BY id"
+    )
+    op.drop_index('ix_arsip_jawaban_pengguna_id_pengguna', table_name='arsip_jawaban_pengguna')
+    op.drop_table('arsip_jawaban_pengguna')
+    op.rename_table('arsip_jawaban_pengguna_baru', 'arsip_jawaban_pengguna')
+    op.create_index('ix_arsip_jawaban_pengguna_id_pengguna', 'arsip_jawaban_pengguna', ['id_pengguna'], unique=False)
+    op.create_index('ix_arsip_jawaban_pengguna_id_jawaban_asal', 'arsip_jawaban_pengguna', ['id_jawaban_asal'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Gagal bila satu id asli diarsipkan lebih dari sekali
+    _buat_tabel('arsip_jawaban_pengguna_lama', id_sendiri=False)
+    op.execute(
+        f"INSERT INTO arsip_jawaban_pengguna_lama (id, {KOLOM_DATA}) "
+        f"SELECT id_jawaban_asal, {KOLOM_DATA} FROM arsip_jawaban_pengguna"
+    )
+    op.drop_index('ix_arsip_jawaban_pengguna_id_jawaban_asal', table_name='arsip_jawaban_pengguna')
+    op.drop_index('ix_arsip_jawaban_pengguna_id_pengguna', table_name='arsip_jawaban_pengguna')
+    op.drop_table('arsip_jawaban_pengguna')
+    op.rename_table('arsip_jawaban_pengguna_lama', 'arsip_jawaban_pengguna')
+    op.create_index('ix_arsip_jawaban_pengguna_id_pengguna', 'arsip_jawaban_pengguna', ['id_pengguna'], unique=False)
@@ -0,0 +1,297 @@
+# File: akun_import.py
+"""
+Impor massal akun siswa/guru dari roster CSV atau XLSX.
+
+- Setiap baris divalidasi dengan skema registrasi yang sama (SiswaRegister
+  / GuruRegister).
+- Duplikasi email, NISN, dan NIP dicek sekaligus dengan query IN, baik
+  terhadap DB maupun antar-baris dalam file.
+- Hash password dikerjakan paralel di satu process pool per proses
+  (ukuran IMPORT_HASH_WORKERS, start method spawn karena worker uvicorn
+  berthread) yang dipakai bersama oleh semua impor.
+- Email dibandingkan tanpa membedakan huruf besar/kecil, sama seperti
+  collation MySQL.
+- Kolom NISN/NIP/nomor telepon dibaca sebagai teks. Sel XLSX berisi angka
+  hanya diterima bila format selnya masker nol (mis. 0000000000); selain
+  itu baris ditolak karena angka 0 di depan sudah hilang.
+- Pengguna dan Siswa/Guru ditulis per batch dalam satu transaksi.
+
+Pemakaian CLI:
+    python -m app.akun_import roster.csv --peran siswa
+"""
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.counters import admin_counters
+from app.database import SessionLocal
+from app.models import Guru, Pengguna, PeranEnum, Siswa
+from app.schemas.guru import GuruRegister
+from app.schemas.siswa import SiswaRegister
+from app.security import get_password_hash
+from app.versi_data import kunci_sekolah, naikkan_versi
+
+BATCH_SIZE = 500
+LOOKUP_CHUNK_SIZE = 1000
+HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", "0")) or min(os.cpu_count() or 1, 4)
+# Di bawah jumlah ini hash dikerjakan langsung, tanpa biaya start process pool
+MIN_PARALLEL_HASH = 16
+
+STATUS_DITAMBAHKAN = "ditambahkan"
+STATUS_DITOLAK = "ditolak"
+STATUS_GAGAL = "gagal"
+
+# Kolom identitas yang boleh diawali 0 atau lebih panjang dari presisi float
+KOLOM_TEKS = ("nisn", "nip", "nomor_telepon")
+
+_ROLE_CONFIG = {
+    PeranEnum.siswa: {
+        "schema": SiswaRegister,
+        "model": Siswa,
+        "id_field": "nisn",
+        "date_format": "%d-%m-%Y",
+        "fields": [
+            "nisn", "nama_lengkap", "nomor_telepon", "tanggal_lahir",
+            "jenis_kelamin", "kelas", "nama_sekolah", "penyandang_disabilitas",
+        ],
+    },
+    PeranEnum.guru: {
+        "schema": GuruRegister,
+        "model": Guru,
+        "id_field": "nip",
+        "date_format": "%Y-%m-%d",
+        "fields": [
+            "nip", "nama_lengkap", "nomor_telepon", "tanggal_lahir",
+            "jenis_kelamin", "tingkat_pendidikan", "nama_sekolah",
+        ],
+    },
+}
+
+
+def _cell(value, date_format: str) -> Optional[str]:
+    """Samakan nilai sel XLSX/CSV menjadi string seperti input form registrasi."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.strftime(date_format)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _teks_xlsx(cell):
+    """Sel angka dengan format masker nol dikembalikan sebagai teks ber-padding."""
+    value = cell.value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        fmt = cell.number_format or ""
+        if fmt and set(fmt) == {"0"} and float(value).is_integer():
+            return str(int(value)).zfill(len(fmt))
+    return value
+
+
+def read_roster(file: BinaryIO, filename: str) -> Iterator[Tuple[int, Dict]]:
+    """Hasilkan (nomor baris, dict kolom) dari file CSV atau XLSX."""
+    if filename.lower().endswith(".xlsx"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Impor XLSX membutuhkan paket openpyxl")
+        sheet = load_workbook(file, read_only=True, data_only=True).active
+        rows = sheet.iter_rows()
+        header = [str(c.value).strip().lower() if c.value is not None else "" for c in next(rows, [])]
+        for line, row in enumerate(rows, start=2):
+            values = [
+                _teks_xlsx(cell) if name in KOLOM_TEKS else cell.value
+                for name, cell in zip(header, row)
+            ]
+            if any(v is not None for v in values):
+                yield line, dict(zip(header, values))
+    else:
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        reader = csv.DictReader(text)
+        reader.fieldnames = [h.strip().lower() for h in reader.fieldnames or []]
+        for row in reader:
+            yield reader.line_num, row
+
+
+def _existing(db: Session, column, values: List[str]) -> set:
+    found = set()
+    for i in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[i:i + LOOKUP_CHUNK_SIZE]
+        found.update(v for (v,) in db.query(column).filter(column.in_(chunk)))
+    return found
+
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            # fork dari proses berthread bisa deadlock; spawn memulai interpreter baru
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_executor
+
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    if len(passwords) < MIN_PARALLEL_HASH or HASH_WORKERS <= 1:
+        return [get_password_hash(p) for p in passwords]
+    chunksize = max(1, len(passwords) // (HASH_WORKERS * 4))
+    return list(_get_hash_executor().map(get_password_hash, passwords, chunksize=chunksize))
+
+
+def import_akun(
+    db: Session,
+    rows: Iterator[Tuple[int, Dict]],
+    peran: PeranEnum,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    started = time.perf_counter()
+    config = _ROLE_CONFIG[peran]
+    schema, model, id_field = config["schema"], config["model"], config["id_field"]
+
+    report = []
+    valid = []  # (index di report, data tervalidasi)
+
+    # 1. Validasi per baris dengan skema registrasi
+    for line, raw in rows:
+        data = {k: _cell(v, config["date_format"]) for k, v in raw.items() if k}
+        data.setdefault("confirm_password", data.get("password"))
+        entry = {"baris": line, "email": data.get("email"), "status": STATUS_DITOLAK, "alasan": None}
+        report.append(entry)
+        angka = [k for k in KOLOM_TEKS if isinstance(raw.get(k), (int, float))]
+        if angka:
+            entry["alasan"] = f"{angka[0]}: sel XLSX harus berformat teks agar angka 0 di depan tidak hilang"
+            continue
+        try:
+            valid.append((len(report) - 1, schema(**data)))
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(loc) for loc in error["loc"])
+            entry["alasan"] = f"{field}: {error['msg']}" if field else error["msg"]
+
+    # 2. Cek duplikasi email dan NISN/NIP secara set-based
+    # Collation MySQL tidak membedakan huruf, jadi email dibandingkan dalam huruf kecil
+    existing_emails = {e.lower() for e in _existing(db, Pengguna.email, [d.email.lower() for _, d in valid])}
+    existing_ids = _existing(db, getattr(model, id_field), [getattr(d, id_field) for _, d in valid])
+
+    accepted = []
+    seen_emails, seen_ids = set(), set()
+    for idx, data in valid:
+        identitas = getattr(data, id_field)
+        email = data.email.lower()
+        if email in existing_emails or email in seen_emails:
+            report[idx]["alasan"] = "Email sudah terdaftar"
+        elif identitas in existing_ids or identitas in seen_ids:
+            report[idx]["alasan"] = f"{id_field.upper()} sudah terdaftar"
+        else:
+            seen_emails.add(email)
+            seen_ids.add(identitas)
+            accepted.append((idx, data))
+
+    # 3. Hash password secara paralel
+    hashes = _hash_passwords([data.password for _, data in accepted])
+
+    # 4. Tulis per batch: Pengguna, ambil ID berdasarkan email, lalu Siswa/Guru
+    inserted = 0
+    for start in range(0, len(accepted), batch_size):
+        batch = accepted[start:start + batch_size]
+        batch_hashes = hashes[start:start + batch_size]
+        try:
+            now = datetime.utcnow()
+            db.execute(insert(Pengguna).values([
+                {
+                    "email": data.email,
+                    "kata_sandi": hashed,
+                    "peran": peran,
+                    "dibuat_pada": now,
+                    "diperbarui_pada": now,
+                }
+                for (_, data), hashed in zip(batch, batch_hashes)
+            ]))
+            ids = dict(
+                db.query(Pengguna.email, Pengguna.id)
+                .filter(Pengguna.email.in_([data.email for _, data in batch]))
+            )
+            profiles = []
+            for _, data in batch:
+                profile = {field: getattr(data, field) for field in config["fields"]}
+                profile["tanggal_lahir"] = datetime.strptime(
+                    data.tanggal_lahir, config["date_format"]
+                ).date()
+                profile["id_pengguna"] = ids[data.email]
+                profiles.append(profile)
+            db.execute(insert(model).values(profiles))
+            if peran == PeranEnum.siswa:
+                naikkan_versi(db, *(kunci_sekolah(p["nama_sekolah"]) for p in profiles))
+            db.commit()
+        except IntegrityError as e:
+            # Bentrok dengan registrasi yang masuk bersamaan; batch dibatalkan
+            db.rollback()
+            for idx, _ in batch:
+                report[idx]["status"] = STATUS_GAGAL
+                report[idx]["alasan"] = f"Gagal menyimpan batch: {str(e.orig)}"
+            continue
+        except Exception:
+            db.rollback()
+            raise
+        for idx, _ in batch:
+            report[idx]["status"] = STATUS_DITAMBAHKAN
+        inserted += len(batch)
+
+    admin_counters.incr(peran.value, inserted)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "peran": peran.value,
+        "total_baris": len(report),
+        "ditambahkan": inserted,
+        "ditolak": sum(1 for r in report if r["status"] == STATUS_DITOLAK),
+        "gagal": sum(1 for r in report if r["status"] == STATUS_GAGAL),
+        "durasi_detik": round(elapsed, 3),
+        "baris": report,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Impor massal akun siswa/guru dari CSV/XLSX")
+    parser.add_argument("path", help="Path file roster (.csv atau .xlsx)")
+    parser.add_argument("--peran", choices=["siswa", "guru"], required=True)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            report = import_akun(
+                db, read_roster(f, args.path), PeranEnum(args.peran), args.batch_size
+            )
+    finally:
+        db.close()
+    json.dump(report, sys.stdout, indent=2, ensure_ascii=False, default=str)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# File: arsip_jawaban.py
+"""
+Arsip lembar jawaban lama.
+
+Setelah dinilai, JawabanPengguna.jawaban hanya dibaca untuk audit. Job ini
+memindahkan lembar jawaban yang lebih tua dari ARSIP_JAWABAN_HARI ke tabel
+arsip_jawaban_pengguna dalam bentuk JSON terkompresi zlib, per batch
+(keyset pada id) dan satu transaksi per batch. get_jawaban() membaca dari
+tabel aktif lalu arsip, sehingga pemanggil tidak perlu tahu lokasinya.
+
+Arsip punya primary key sendiri; id asli disimpan di id_jawaban_asal
+(terindeks, tidak unik). SQLite dan MySQL < 8.0 (setelah restart) memberi
+id baru max(id)+1, sehingga id yang sudah diarsipkan bisa dipakai lagi
+oleh tabel aktif, mis. setelah pengguna pemilik baris terakhir dihapus.
+Insert arsip tidak pernah bentrok karenanya; baris id terbesar tetap
+tidak diarsipkan agar pemakaian ulang itu jarang terjadi. Bila terjadi,
+get_jawaban() mendahulukan tabel aktif dan lembar arsipnya tetap dapat
+dibaca dengan arsip=True.
+
+Pemakaian CLI:
+    python -m app.arsip_jawaban --hari 365 --batch-size 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.jawaban_bit import decode_jawaban
+from app.models import ArsipJawabanPengguna, JawabanPengguna
+
+ARSIP_JAWABAN_HARI = int(os.getenv("ARSIP_JAWABAN_HARI", "365"))
+BATCH_SIZE = 1000
+
+
+def kompres_jawaban(jawaban: list) -> bytes:
+    return zlib.compress(json.dumps(jawaban, separators=(",", ":")).encode(), 9)
+
+
+def dekompres_jawaban(data: bytes) -> list:
+    return json.loads(zlib.decompress(data))
+
+
+def _jawaban_dari_row(row) -> list:
+    if row.jawaban_bit is not None:
+        return decode_jawaban(row.jawaban_bit, row.jumlah_jawaban)
+    return row.jawaban_json
+
+
+def arsipkan_jawaban(
+    db: Session,
+    hari: int = ARSIP_JAWABAN_HARI,
+    batch_size: int = BATCH_SIZE,
+    max_batch: Optional[int] = None,
+) -> dict:
+    started = time.perf_counter()
+    batas = datetime.utcnow() - timedelta(days=hari)
+    last_id = 0
+    diarsipkan = batch_count = bytes_asli = bytes_arsip = 0
+    # Baris id terbesar tetap di tabel aktif agar id-nya tidak dipakai ulang
+    max_id = db.query(func.max(JawabanPengguna.id)).scalar() or 0
+
+    while max_batch is None or batch_count < max_batch:
+        rows = (
+            db.query(
+                JawabanPengguna.id,
+                JawabanPengguna.id_pengguna,
+                JawabanPengguna.jawaban_json,
+                JawabanPengguna.jawaban_bit,
+                JawabanPengguna.jumlah_jawaban,
+                JawabanPengguna.versi_soal,
+                JawabanPengguna.dijawab_pada,
+            )
+            .filter(
+                JawabanPengguna.id > last_id,
+                JawabanPengguna.id < max_id,
+                JawabanPengguna.dijawab_pada < batas
+            )
+            .order_by(JawabanPengguna.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        now = datetime.utcnow()
+        arsip = []
+        for row in rows:
+            jawaban = _jawaban_dari_row(row)
+            data = kompres_jawaban(jawaban)
+            bytes_asli += len(json.dumps(jawaban))
+            bytes_arsip += len(data)
+            arsip.append({
+                "id_jawaban_asal": row.id,
+                "id_pengguna": row.id_pengguna,
+                "jawaban_zlib": data,
+                "versi_soal": row.versi_soal,
+                "dijawab_pada": row.dijawab_pada,
+                "diarsipkan_pada": now,
+            })
+        ids = [row.id for row in rows]
+
+        try:
+            db.execute(insert(ArsipJawabanPengguna).values(arsip))
+            db.execute(
+                delete(JawabanPengguna).where(JawabanPengguna.id.in_(ids)),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        diarsipkan += len(ids)
+        batch_count += 1
+        last_id = ids[-1]
+
+    return {
+        "batas_tanggal": batas.isoformat(),
+        "diarsipkan": diarsipkan,
+        "batch": batch_count,
+        "bytes_asli": bytes_asli,
+        "bytes_arsip": bytes_arsip,
+        "durasi_detik": round(time.perf_counter() - started, 3),
+    }
+
+
+def get_jawaban(db: Session, id_jawaban: int, arsip: bool = False) -> Optional[dict]:
+    """
+    Baca lembar jawaban dari tabel aktif, atau dari arsip bila sudah dipindahkan.
+    Bila id asli sudah dipakai ulang, tabel aktif didahulukan; arsip=True
+    membaca lembar arsip dengan id asli tersebut.
+    """
+    if not arsip:
+        row = db.query(JawabanPengguna).filter(JawabanPengguna.id == id_jawaban).first()
+        if row:
+            return {
+                "id": row.id,
+                "id_pengguna": row.id_pengguna,
+                "jawaban": row.jawaban,
+                "versi_soal": row.versi_soal,
+                "dijawab_pada": row.dijawab_pada,
+                "diarsipkan": False,
+            }
+
+    row = (
+        db.query(ArsipJawabanPengguna)
+        .filter(ArsipJawabanPengguna.id_jawaban_asal == id_jawaban)
+        .order_by(ArsipJawabanPengguna.id.desc())
+        .first()
+    )
+    if row:
+        return {
+            "id": row.id_jawaban_asal,
+            "id_pengguna": row.id_pengguna,
+            "jawaban": dekompres_jawaban(row.jawaban_zlib),
+            "versi_soal": row.versi_soal,
+            "dijawab_pada": row.dijawab_pada,
+            "diarsipkan": True,
+        }
+    return None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Arsipkan lembar jawaban lama ke tabel terkompresi")
+    parser.add_argument("--hari", type=int, default=ARSIP_JAWABAN_HARI, help="Umur minimal jawaban (hari)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-batch", type=int, default=None, help="Berhenti setelah N batch")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        report = arsipkan_jawaban(db, args.hari, args.batch_size, args.max_batch)
+    finally:
+        db.close()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
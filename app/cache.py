@@ -0,0 +1,271 @@
+# File: cache.py
+"""
+Backend cache yang bisa diganti dan koherensi cache antar worker.
+
+Backend (cache_backend) dipilih dari environment:
+- tanpa REDIS_URL: MemoryLRUBackend, LRU ber-TTL di memori per worker;
+- REDIS_URL diset: RedisBackend, dipakai bersama semua worker. Client
+  redis-py dibuat dari URL; client lain dengan API yang sama (mis.
+  fakeredis untuk pengujian lokal) dapat diberikan langsung. Nilai
+  disimpan sebagai JSON, jadi hanya nilai JSON yang bisa di-cache.
+Error Redis diperlakukan sebagai cache miss agar request tetap berjalan.
+
+Cache di memori worker (katalog rekomendasi, indeks sekolah) didaftarkan
+ke cache_coherence dengan satu kunci versi_data. Setelah commit, penulis
+memanggil cache_coherence.invalidate(kunci): cache lokal dibuang dan pesan
+dikirim lewat Redis pub/sub ke worker lain. Karena penulis juga menaikkan
+versi kunci tersebut di transaksi yang sama, setiap worker memeriksa
+tabel versi_data setiap CACHE_POLL_SECONDS sebagai fallback bila Redis
+tidak dipakai atau pesan hilang.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from app.versi_data import get_versi
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "gayabelajar:")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+# Dengan Redis, polling hanya jaring pengaman sehingga boleh lebih jarang
+CACHE_POLL_SECONDS = float(os.getenv("CACHE_POLL_SECONDS", "30" if REDIS_URL else "5"))
+
+INVALIDATION_CHANNEL = CACHE_PREFIX + "invalidasi"
+
+
+class CacheBackend:
+    """Antarmuka backend; get() mengembalikan None bila tidak ada."""
+
+    supports_pubsub = False
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def publish(self, channel: str, message: str):
+        pass
+
+    def subscribe(self, channel: str, callback: Callable[[str], None], stop: threading.Event):
+        raise NotImplementedError
+
+
+class MemoryLRUBackend(CacheBackend):
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend(CacheBackend):
+    supports_pubsub = True
+
+    def __init__(self, client, prefix: str = CACHE_PREFIX):
+        self.client = client
+        self.prefix = prefix
+        try:
+            import redis
+            self._errors = (redis.RedisError, OSError)
+        except ImportError:
+            self._errors = (OSError,)
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except self._errors as e:
+            logger.warning("Redis GET gagal: %s", e)
+            return None
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000) if ttl else None)
+        except self._errors as e:
+            logger.warning("Redis SET gagal: %s", e)
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self.prefix + key)
+        except self._errors as e:
+            logger.warning("Redis DEL gagal: %s", e)
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=self.prefix + "*", count=500))
+            for i in range(0, len(keys), 500):
+                self.client.delete(*keys[i:i + 500])
+        except self._errors as e:
+            logger.warning("Redis clear gagal: %s", e)
+
+    def publish(self, channel: str, message: str):
+        try:
+            self.client.publish(channel, message)
+        except self._errors as e:
+            # Worker lain tetap menyusul lewat polling versi_data
+            logger.warning("Redis PUBLISH gagal: %s", e)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None], stop: threading.Event):
+        """Blok sampai stop diset; berlangganan ulang setelah koneksi putus."""
+        while not stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(channel)
+                while not stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        data = message["data"]
+                        callback(data.decode() if isinstance(data, bytes) else data)
+            except self._errors as e:
+                logger.warning("Langganan Redis terputus: %s", e)
+                stop.wait(5)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except self._errors:
+                        pass
+
+
+def buat_backend(redis_url: Optional[str] = REDIS_URL) -> CacheBackend:
+    if not redis_url:
+        return MemoryLRUBackend()
+    try:
+        import redis
+    except ImportError:
+        logger.error("REDIS_URL diset tetapi paket redis tidak terpasang; memakai cache memori")
+        return MemoryLRUBackend()
+    return RedisBackend(redis.Redis.from_url(redis_url, socket_timeout=2, socket_connect_timeout=2))
+
+
+class CacheCoherence:
+    def __init__(self, backend: CacheBackend, poll_seconds: float = CACHE_POLL_SECONDS):
+        self.backend = backend
+        self.poll_seconds = poll_seconds
+        self.instance_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, List[Callable[[], None]]] = {}
+        self._versi: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._session_factory = None
+
+    def register(self, kunci: str, invalidate: Callable[[], None]):
+        with self._lock:
+            self._handlers.setdefault(kunci, []).append(invalidate)
+
+    def _run_handlers(self, kunci: str):
+        for invalidate in self._handlers.get(kunci, []):
+            try:
+                invalidate()
+            except Exception:
+                logger.exception("Invalidasi cache %s gagal", kunci)
+
+    def publish(self, kunci: str):
+        """Minta worker lain membuang cache kunci ini (dipanggil setelah commit)."""
+        self.backend.publish(INVALIDATION_CHANNEL, json.dumps({"kunci": kunci, "asal": self.instance_id}))
+
+    def invalidate(self, kunci: str):
+        """Buang cache lokal lalu siarkan ke worker lain (dipanggil setelah commit)."""
+        self._run_handlers(kunci)
+        self.publish(kunci)
+
+    def _on_message(self, data: str):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get("asal") != self.instance_id:
+            self._run_handlers(message.get("kunci"))
+
+    def poll_once(self):
+        """Bandingkan versi_data dengan versi terakhir yang terlihat."""
+        if not self._handlers or self._session_factory is None:
+            return
+        db = self._session_factory()
+        try:
+            versi = get_versi(db, list(self._handlers))
+        finally:
+            db.close()
+        for kunci, nilai in versi.items():
+            lama = self._versi.get(kunci)
+            self._versi[kunci] = nilai
+            if lama is not None and lama != nilai:
+                self._run_handlers(kunci)
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning("Polling versi cache gagal: %s", e)
+
+    def start(self, session_factory):
+        """
+        Dipanggil sebelum cache dimuat saat startup: versi awal dibaca lebih
+        dulu sehingga perubahan selama pemuatan tetap terdeteksi.
+        """
+        self._session_factory = session_factory
+        try:
+            self.poll_once()
+        except Exception as e:
+            logger.warning("Gagal membaca versi cache awal: %s", e)
+        self._stop.clear()
+        targets = [self._poll_loop]
+        if self.backend.supports_pubsub:
+            targets.append(lambda: self.backend.subscribe(INVALIDATION_CHANNEL, self._on_message, self._stop))
+        self._threads = [threading.Thread(target=t, daemon=True) for t in targets]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+
+cache_backend = buat_backend()
+cache_coherence = CacheCoherence(cache_backend)
@@ -0,0 +1,80 @@
+# File: counters.py
+"""
+Cache penghitung untuk dashboard admin.
+
+Nilai awal diambil dengan satu query ber-GROUP BY, lalu diperbarui secara
+inkremental oleh registrasi, penghapusan pengguna, dan submit jawaban.
+Karena setiap worker menyimpan salinannya sendiri, cache direkonsiliasi
+ulang ke hitungan asli setiap DASHBOARD_RECONCILE_SECONDS detik.
+"""
+import os
+import time
+from threading import Lock
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import ArsipJawabanPengguna, JawabanPengguna, Pengguna, PeranEnum
+
+RECONCILE_SECONDS = int(os.getenv("DASHBOARD_RECONCILE_SECONDS", "300"))
+
+TES_SELESAI = "tes_selesai"
+
+
+def count_dashboard(db: Session) -> Dict[str, int]:
+    """Hitung jumlah pengguna per peran dan total tes dalam satu query."""
+    # Lembar jawaban yang sudah diarsipkan tetap dihitung sebagai tes selesai
+    total_tes = (
+        select(func.count(JawabanPengguna.id)).scalar_subquery()
+        + select(func.count(ArsipJawabanPengguna.id)).scalar_subquery()
+    )
+    rows = (
+        db.query(Pengguna.peran, func.count(Pengguna.id), total_tes)
+        .group_by(Pengguna.peran)
+        .all()
+    )
+    counts = {peran.value: 0 for peran in PeranEnum}
+    counts[TES_SELESAI] = 0
+    for peran, jumlah, tes in rows:
+        counts[peran.value] = jumlah
+        counts[TES_SELESAI] = tes
+    return counts
+
+
+class CounterCache:
+    def __init__(self, reconcile_seconds: int = RECONCILE_SECONDS):
+        self.reconcile_seconds = reconcile_seconds
+        self._lock = Lock()
+        self._counts: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+
+    def get(self, db: Session) -> Dict[str, int]:
+        with self._lock:
+            fresh = (
+                self._counts is not None
+                and time.monotonic() - self._loaded_at < self.reconcile_seconds
+            )
+            if fresh:
+                return dict(self._counts)
+        return self.reconcile(db)
+
+    def reconcile(self, db: Session) -> Dict[str, int]:
+        counts = count_dashboard(db)
+        with self._lock:
+            self._counts = counts
+            self._loaded_at = time.monotonic()
+        return dict(counts)
+
+    def incr(self, key: str, delta: int = 1):
+        """Dipanggil setelah commit; diabaikan bila cache belum dimuat."""
+        with self._lock:
+            if self._counts is not None:
+                self._counts[key] = max(0, self._counts.get(key, 0) + delta)
+
+    def invalidate(self):
+        with self._lock:
+            self._counts = None
+
+
+admin_counters = CounterCache()
@@ -1,16 +1,76 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 import os
 
+from app.pool_metrics import InstrumentedQueuePool, instrument_engine
+
 load_dotenv()  
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Pengaturan pool; recycle di bawah wait_timeout MySQL agar tidak "server has gone away"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+def _engine_options(url: str, poolclass=InstrumentedQueuePool) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # SQLite in-memory memakai pool khusus tanpa pengaturan ukuran
+        return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+# insert_ignore()/upsert() hanya punya bentuk SQL untuk dialek ini
+SUPPORTED_DIALECTS = ("mysql", "sqlite", "postgresql")
+
+
+def _cek_dialek(engine):
+    if engine.dialect.name not in SUPPORTED_DIALECTS:
+        raise RuntimeError(
+            f"Dialek database {engine.dialect.name} tidak didukung; "
+            f"gunakan salah satu dari {', '.join(SUPPORTED_DIALECTS)}"
+        )
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+_cek_dialek(engine)
+instrument_engine(engine)
+
+if engine.dialect.name == "sqlite":
+    # SQLite baru menjalankan ON DELETE CASCADE bila foreign key diaktifkan
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
 
-engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Replica baca opsional; bila tidak diset semua query memakai primary
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+replica_engine = None
+ReplicaSessionLocal = None
+if DATABASE_REPLICA_URL:
+    # Statistik pool_metrics hanya untuk primary
+    replica_engine = create_engine(DATABASE_REPLICA_URL, **_engine_options(DATABASE_REPLICA_URL, QueuePool))
+    _cek_dialek(replica_engine)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
 Base = declarative_base()
 
 def get_db():
@@ -18,4 +78,33 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def insert_ignore(db, model):
+    """INSERT multi-baris yang melewati baris bentrok unique key, sesuai dialek DB."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        return insert(model).prefix_with("IGNORE")
+    if dialect == "sqlite":
+        return insert(model).prefix_with("OR IGNORE")
+    # postgresql; dialek lain ditolak _cek_dialek() saat startup
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    return pg_insert(model).on_conflict_do_nothing()
+
+def upsert(db, model, index_elements, update_columns):
+    """INSERT multi-baris yang memperbarui update_columns bila unique key bentrok."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(model)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+    # sqlite/postgresql; dialek lain ditolak _cek_dialek() saat startup
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    stmt = dialect_insert(model)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={c: stmt.excluded[c] for c in update_columns}
+    )
@@ -0,0 +1,192 @@
+# File: fast_response.py
+"""
+Jalur respons cepat untuk payload besar.
+
+FastJSONResponse (opt-in per endpoint): handler yang membangun list/dict
+dari baris DB yang sudah terpercaya mengembalikan FastJSONResponse(data).
+FastAPI tidak lagi memvalidasi ulang data lewat response_model (yang tetap
+dipasang untuk dokumentasi OpenAPI), dan serialisasi memakai orjson bila
+terpasang (fallback ke json stdlib). Data harus sudah persis sesuai skema
+response_model, karena field tidak lagi disaring.
+
+ModelResponse (opt-in per endpoint): untuk respons yang tetap harus
+mengikuti skema. Body divalidasi dan diserialisasi sekali oleh TypeAdapter
+yang di-cache per tipe (adapter()), seluruhnya di pydantic-core, alih-alih
+objek Pydantic dibangun di handler lalu divalidasi dan diserialisasi ulang
+oleh FastAPI. Daftar dibangun dari baris query dengan baris_ke_dict().
+model_construct tidak dipakai: di pydantic 2.11 ia dijalankan di Python dan
+lebih lambat per baris daripada validasi (lihat
+benchmarks/response_serialization.py).
+
+CompressionMiddleware: mengompres respons teks/JSON di atas
+COMPRESS_MIN_SIZE byte dengan brotli (bila terpasang dan diterima klien)
+atau gzip. Respons streaming (lebih dari satu pesan body) diteruskan apa
+adanya. Kompresi body besar dijalankan di threadpool agar event loop tidak
+tertahan.
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence
+
+import anyio
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependensi opsional
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependensi opsional
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_THREAD_MIN_SIZE = int(os.getenv("COMPRESS_THREAD_MIN_SIZE", str(256 * 1024)))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/xml", "application/javascript")
+
+
+def _default(obj: Any):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipe {type(obj).__name__} tidak bisa diserialisasi ke JSON")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def adapter(tipe: Any) -> TypeAdapter:
+    """TypeAdapter per tipe; validator dan serializer pydantic-core dibangun sekali."""
+    return TypeAdapter(tipe)
+
+
+def baris_ke_dict(rows: Sequence) -> List[dict]:
+    """Baris hasil db.query(kolom...) ke dict; nama kolom diambil sekali dari baris pertama."""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+class ModelResponse(JSONResponse):
+    def __init__(self, content: Any, tipe: Any, status_code: int = 200, headers: Optional[dict] = None):
+        self.tipe = tipe
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        type_adapter = adapter(self.tipe)
+        return type_adapter.dump_json(type_adapter.validate_python(content))
+
+
+def pilih_encoding(accept_encoding: str) -> Optional[str]:
+    """Pilih 'br' atau 'gzip' dari header Accept-Encoding (abaikan q=0)."""
+    diterima = set()
+    for bagian in accept_encoding.lower().split(","):
+        nama, _, params = bagian.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        diterima.add(nama.strip())
+    if brotli is not None and "br" in diterima:
+        return "br"
+    if "gzip" in diterima or "*" in diterima:
+        return "gzip"
+    return None
+
+
+def kompres(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = pilih_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = {k.lower(): v for k, v in start_message["headers"]}
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or b"content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= COMPRESS_THREAD_MIN_SIZE:
+                compressed = await anyio.to_thread.run_sync(kompres, body, encoding)
+            else:
+                compressed = kompres(body, encoding)
+            raw_headers = [(k, v) for k, v in start_message["headers"] if k.lower() not in (b"content-length", b"vary")]
+            vary = headers.get(b"vary")
+            raw_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+            ]
+            await send({**start_message, "headers": raw_headers})
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
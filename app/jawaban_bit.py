@@ -0,0 +1,63 @@
+# File: jawaban_bit.py
+"""
+Encoding ringkas lembar jawaban.
+
+Jawaban untuk soal 1..n disimpan sebagai bitmask: bit ke-(id_soal - 1)
+bernilai 1 bila memilih A dan 0 bila memilih B. 44 jawaban muat dalam
+satu BIGINT, menggantikan ~1.2 KB JSON, dan skor per dimensi cukup
+dihitung dengan AND + popcount. Kolom jawaban_bit adalah BIGINT bertanda,
+jadi lembar dengan lebih dari MAX_JAWABAN_BIT jawaban tetap disimpan
+sebagai JSON.
+"""
+from typing import Dict, List, Optional, Tuple
+
+# Bit ke-63 adalah bit tanda BIGINT
+MAX_JAWABAN_BIT = 63
+
+# Rentang id soal per dimensi, sama dengan hitung_skor_dimensi di submit_jawaban
+DIMENSI_RENTANG = {
+    "pemrosesan": (1, 11),
+    "persepsi": (12, 22),
+    "input": (23, 33),
+    "pemahaman": (34, 44),
+}
+
+DIMENSI_MASK = {
+    dimensi: ((1 << (end - start + 1)) - 1) << (start - 1)
+    for dimensi, (start, end) in DIMENSI_RENTANG.items()
+}
+
+
+def encode_jawaban(jawaban: List[dict]) -> Optional[Tuple[int, int]]:
+    """
+    Kembalikan (bitmask, jumlah jawaban), atau None bila jawaban tidak
+    berbentuk id_soal 1..n yang lengkap dengan pilihan A/B atau n melebihi
+    MAX_JAWABAN_BIT.
+    """
+    bits = 0
+    seen = set()
+    for item in jawaban:
+        id_soal, pilihan = item.get("id_soal"), str(item.get("pilihan", "")).upper()
+        if not isinstance(id_soal, int) or id_soal < 1 or id_soal in seen or pilihan not in ("A", "B"):
+            return None
+        seen.add(id_soal)
+        if pilihan == "A":
+            bits |= 1 << (id_soal - 1)
+    if len(seen) > MAX_JAWABAN_BIT or seen != set(range(1, len(seen) + 1)):
+        return None
+    return bits, len(seen)
+
+
+def decode_jawaban(bits: int, jumlah: int) -> List[dict]:
+    return [
+        {"id_soal": i, "pilihan": "A" if bits >> (i - 1) & 1 else "B"}
+        for i in range(1, jumlah + 1)
+    ]
+
+
+def hitung_skor_bit(bits: int) -> Dict[str, int]:
+    """Skor mentah per dimensi: jumlah A dikurangi jumlah B."""
+    return {
+        dimensi: 2 * (bits & mask).bit_count() - (DIMENSI_RENTANG[dimensi][1] - DIMENSI_RENTANG[dimensi][0] + 1)
+        for dimensi, mask in DIMENSI_MASK.items()
+    }
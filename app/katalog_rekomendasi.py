@@ -0,0 +1,125 @@
+# File: katalog_rekomendasi.py
+"""
+Katalog rekomendasi gaya belajar di memori.
+
+Tabel rekomendasi kecil (24 kategori + default per dimensi) dan jarang
+berubah, sehingga dimuat utuh sekali lalu dibaca dari memori. Setiap
+penulisan katalog menaikkan versi KATALOG sebelum commit dan memanggil
+cache_coherence.invalidate(KATALOG) setelahnya, sehingga katalog di worker
+lain ikut dibuang.
+
+Pencocokan kategori/gaya belajar tidak membedakan huruf besar/kecil,
+sama seperti collation default MySQL yang dipakai query sebelumnya.
+"""
+from collections import namedtuple
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.cache import cache_coherence
+from app.database import upsert
+from app.models import RekomendasiGayaBelajar
+from app.versi_data import KATALOG, naikkan_versi
+
+UPSERT_BATCH_SIZE = 500
+
+Rekomendasi = namedtuple("Rekomendasi", "id kategori gaya_belajar penjelasan rekomendasi")
+
+
+def _key(kategori: str, gaya_belajar: str) -> Tuple[str, str]:
+    return kategori.casefold(), gaya_belajar.casefold()
+
+
+class KatalogRekomendasi:
+    def __init__(self):
+        self._lock = Lock()
+        self._items: Optional[Dict[Tuple[str, str], Rekomendasi]] = None
+
+    def load(self, db: Session) -> Dict[Tuple[str, str], Rekomendasi]:
+        rows = db.query(
+            RekomendasiGayaBelajar.id,
+            RekomendasiGayaBelajar.kategori,
+            RekomendasiGayaBelajar.gaya_belajar,
+            RekomendasiGayaBelajar.penjelasan,
+            RekomendasiGayaBelajar.rekomendasi,
+        ).order_by(RekomendasiGayaBelajar.id).all()
+        items = {}
+        for row in rows:
+            # Sama seperti .first() tanpa ORDER BY: baris pertama yang menang
+            items.setdefault(_key(row.kategori, row.gaya_belajar), Rekomendasi(*row))
+        with self._lock:
+            self._items = items
+        return items
+
+    def get(self, db: Session, kategori: str, gaya_belajar: str, fallback_default: bool = True) -> Optional[Rekomendasi]:
+        items = self._items
+        if items is None:
+            items = self.load(db)
+        rekomendasi = items.get(_key(kategori, gaya_belajar))
+        if rekomendasi is None and fallback_default:
+            rekomendasi = items.get(_key(kategori, "Default"))
+        return rekomendasi
+
+    def all(self, db: Session) -> List[Rekomendasi]:
+        items = self._items
+        if items is None:
+            items = self.load(db)
+        return sorted(items.values(), key=lambda r: r.id)
+
+    def invalidate(self):
+        with self._lock:
+            self._items = None
+
+
+katalog_rekomendasi = KatalogRekomendasi()
+cache_coherence.register(KATALOG, katalog_rekomendasi.invalidate)
+
+
+def upsert_rekomendasi(db: Session, items: Iterable[dict]) -> dict:
+    """
+    Upsert atomik berdasarkan constraint uq_kategori_gaya.
+    Semua batch ditulis dalam satu transaksi; cache diinvalidasi sekali.
+    """
+    # Satu SELECT untuk seluruh katalog, bukan pre-check per baris
+    existing = {
+        _key(kategori, gaya_belajar): (kategori, gaya_belajar)
+        for kategori, gaya_belajar in db.query(
+            RekomendasiGayaBelajar.kategori, RekomendasiGayaBelajar.gaya_belajar
+        )
+    }
+
+    rows = {}
+    total = 0
+    for item in items:
+        total += 1
+        key = _key(item["kategori"], item["gaya_belajar"])
+        if key in existing:
+            # Pakai ejaan yang tersimpan agar konflik juga terdeteksi pada collation case-sensitive
+            item = {**item, "kategori": existing[key][0], "gaya_belajar": existing[key][1]}
+        rows[key] = item
+    values = list(rows.values())
+
+    try:
+        stmt = upsert(
+            db, RekomendasiGayaBelajar,
+            index_elements=["kategori", "gaya_belajar"],
+            update_columns=["penjelasan", "rekomendasi"],
+        )
+        for i in range(0, len(values), UPSERT_BATCH_SIZE):
+            db.execute(stmt.values(values[i:i + UPSERT_BATCH_SIZE]))
+        naikkan_versi(db, KATALOG)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    cache_coherence.invalidate(KATALOG)
+
+    ditambahkan = sum(1 for key in rows if key not in existing)
+    return {
+        "diproses": len(values),
+        "ditambahkan": ditambahkan,
+        "diperbarui": len(values) - ditambahkan,
+        "duplikat": total - len(values),
+    }
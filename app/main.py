@@ -1,8 +1,77 @@
+from contextlib import asynccontextmanager
+import logging
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
-from app.routers import admin, auth, siswa, guru, soal
+from sqlalchemy.exc import SQLAlchemyError
+from app import database
+from app.cache import cache_coherence
+from app.database import SessionLocal
+from app.fast_response import CompressionMiddleware
+from app.katalog_rekomendasi import katalog_rekomendasi
+from app.metrics import MetricsMiddleware, instrument_engine, metrics_endpoint, metrics_flusher
+from app.outbox import OUTBOX_ENABLED, outbox_runner
+from app.query_budget import QUERY_BUDGET_MODE, QueryBudgetMiddleware
+from app.routers import admin, auth, debug, siswa, guru, soal
+from app.sekolah_index import sekolah_index
+from app.slow_query import SLOW_QUERY_MS, slow_query_log
+from app.tracing import TRACE_SAMPLE_RATE, TracingMiddleware, tracer
+from app.versi_soal import set_soal
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+# Cache in-process yang dimuat sebelum worker menerima request
+WARMUP_CACHES = (
+    ("soal", set_soal.load),
+    ("katalog rekomendasi", katalog_rekomendasi.load),
+    ("indeks sekolah", sekolah_index.load_from_db),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Versi cache dibaca sebelum warmup agar perubahan selama pemuatan terdeteksi
+    cache_coherence.start(SessionLocal)
+    db = SessionLocal()
+    try:
+        for nama, load in WARMUP_CACHES:
+            try:
+                load(db)
+            except SQLAlchemyError as e:
+                # Cache akan dimuat saat request pertama
+                db.rollback()
+                logger.warning("Gagal memuat cache %s: %s", nama, e)
+    finally:
+        db.close()
+    if OUTBOX_ENABLED:
+        outbox_runner.start()
+    else:
+        logger.warning("Runner outbox dimatikan; job dijalankan langsung di transaksi request")
+    metrics_flusher.start()
+    yield
+    # Job yang belum selesai tetap di tabel outbox dan diambil worker berikutnya
+    await outbox_runner.stop()
+    # Snapshot terakhir tetap dijumlahkan worker lain
+    metrics_flusher.stop()
+    cache_coherence.stop()
+    # Kirim trace yang masih di antrean ekspor
+    tracer.stop()
+    # Request sudah selesai di-drain; tutup koneksi pool dengan rapi
+    database.engine.dispose()
+    if database.replica_engine is not None:
+        database.replica_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+for engine in (database.engine, database.replica_engine):
+    if engine is None:
+        continue
+    instrument_engine(engine)
+    if SLOW_QUERY_MS > 0:
+        slow_query_log.instrument(engine)
+    if TRACE_SAMPLE_RATE > 0:
+        tracer.instrument(engine)
+app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
 
 # Tambahkan semua router
 app.include_router(auth.router)
@@ -10,6 +79,7 @@ app.include_router(siswa.router)
 app.include_router(guru.router)
 app.include_router(soal.router)
 app.include_router(admin.router)
+app.include_router(debug.router)
 
 
 app.add_middleware(
@@ -22,3 +92,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+# Kompresi gzip/brotli untuk respons di atas COMPRESS_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+if QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+
+if TRACE_SAMPLE_RATE > 0:
+    app.add_middleware(TracingMiddleware)
+
+# Ditambahkan terakhir agar menjadi middleware terluar dan mencakup CORS
+app.add_middleware(MetricsMiddleware)
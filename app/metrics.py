@@ -0,0 +1,391 @@
+# File: metrics.py
+"""
+Metrik latensi dan biaya DB per route.
+
+MetricsMiddleware (ASGI murni) mencatat per template route (mis.
+/admin/jawaban/{jawaban_id}): histogram latensi, jumlah request per status,
+jumlah statement SQL, total waktu DB, dan baris yang dikembalikan/diubah.
+Biaya DB dikumpulkan oleh hook before/after_cursor_execute ke objek
+RequestStats milik request yang sedang berjalan (contextvar, ikut terbawa
+ke threadpool endpoint sync).
+
+Baris dihitung dari cursor.rowcount; untuk SELECT nilainya hanya tersedia
+pada driver ber-buffer seperti PyMySQL (SQLite melaporkan -1).
+
+Semua metrik, ditambah metrik pool koneksi dan runner outbox, diekspos
+dalam format teks Prometheus di GET /metrics. Endpoint tertutup sampai
+METRICS_TOKEN diset; scraper mengirim "Authorization: Bearer <token>".
+
+Metrik disimpan per proses. Dengan beberapa worker (app.server mengisi
+METRICS_DIR), setiap worker menulis snapshot-nya ke METRICS_DIR/<id>.json
+setiap METRICS_FLUSH_SECONDS dan saat berhenti; /metrics menjumlahkan
+snapshot semua worker sehingga scrape ke worker mana pun memberi angka
+yang sama dan counter tidak turun. File worker yang sudah berhenti tetap
+dihitung untuk counter, tetapi tidak untuk gauge.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+
+from app import database
+from app.outbox import outbox_metrics
+from app.pool_metrics import WAIT_BUCKETS_MS, pool_metrics
+
+logger = logging.getLogger(__name__)
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds", "rows", "queries", "scope")
+
+    def __init__(self, record_statements: bool = False, scope: Optional[dict] = None):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        # Teks statement hanya disimpan bila diminta (lihat query_budget)
+        self.queries: Optional[List[str]] = [] if record_statements else None
+        # Scope ASGI request; scope["route"] diisi router setelah routing
+        self.scope = scope
+
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+def start_request_stats(record_statements: bool = False, scope: Optional[dict] = None):
+    """Mulai mengumpulkan biaya DB; kembalikan (stats, token) untuk stop_request_stats."""
+    stats = RequestStats(record_statements, scope)
+    return stats, _current_stats.set(stats)
+
+
+def current_route() -> Optional[str]:
+    """Route request yang sedang berjalan ("GET /guru/siswa"), atau None di luar request."""
+    stats = _current_stats.get()
+    if stats is None or stats.scope is None:
+        return None
+    route = stats.scope.get("route")
+    path = getattr(route, "path_format", None) or stats.scope.get("path")
+    return f'{stats.scope.get("method")} {path}'
+
+
+def stop_request_stats(token):
+    _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    started = getattr(context, "_metrics_started", None)
+    if started is not None:
+        stats.db_seconds += time.perf_counter() - started
+    if cursor.rowcount and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+    if stats.queries is not None:
+        stats.queries.append(statement)
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class _RouteMetrics:
+    __slots__ = ("buckets", "latency_sum", "count", "status", "statements", "db_seconds", "rows")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.count = 0
+        self.status: Dict[int, int] = {}
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+
+
+class RouteMetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        with self._lock:
+            m = self._routes.get((method, route))
+            if m is None:
+                m = self._routes[(method, route)] = _RouteMetrics()
+            m.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            m.latency_sum += seconds
+            m.count += 1
+            m.status[status] = m.status.get(status, 0) + 1
+            m.statements += stats.statements
+            m.db_seconds += stats.db_seconds
+            m.rows += stats.rows
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "method": method,
+                    "route": route,
+                    "buckets": list(m.buckets),
+                    "latency_sum": m.latency_sum,
+                    "count": m.count,
+                    "status": {str(status): n for status, n in m.status.items()},
+                    "statements": m.statements,
+                    "db_seconds": m.db_seconds,
+                    "rows": m.rows,
+                }
+                for (method, route), m in self._routes.items()
+            ]
+
+
+def snapshot_proses(selesai: bool = False) -> dict:
+    """Semua metrik proses ini dalam bentuk yang dapat dijumlahkan antar worker."""
+    return {
+        "waktu": time.time(),
+        "selesai": selesai,
+        "routes": route_metrics.snapshot(),
+        "pool": pool_metrics.snapshot(database.engine.pool),
+        "outbox": outbox_metrics.snapshot(),
+    }
+
+
+def _masih_hidup(snap: dict, now: float) -> bool:
+    return not snap["selesai"] and now - snap["waktu"] <= 3 * METRICS_FLUSH_SECONDS
+
+
+def gabung_snapshot(snaps: List[dict]) -> dict:
+    """Jumlahkan snapshot beberapa worker; gauge hanya dari worker yang masih hidup."""
+    now = time.time()
+    routes: Dict[Tuple[str, str], dict] = {}
+    pool = {"checkouts": 0, "checkout_timeouts": 0, "wait": {"count": 0, "sum_ms": 0.0, "buckets_ms": {}}}
+    outbox: Dict[str, float] = {}
+    for snap in snaps:
+        for r in snap["routes"]:
+            m = routes.get((r["method"], r["route"]))
+            if m is None:
+                routes[(r["method"], r["route"])] = {**r, "buckets": list(r["buckets"]), "status": dict(r["status"])}
+                continue
+            m["buckets"] = [a + b for a, b in zip(m["buckets"], r["buckets"])]
+            for status, n in r["status"].items():
+                m["status"][status] = m["status"].get(status, 0) + n
+            for key in ("latency_sum", "count", "statements", "db_seconds", "rows"):
+                m[key] += r[key]
+
+        p = snap["pool"]
+        pool["checkouts"] += p["checkouts"]
+        pool["checkout_timeouts"] += p["checkout_timeouts"]
+        pool["wait"]["count"] += p["wait"]["count"]
+        pool["wait"]["sum_ms"] += p["wait"]["sum_ms"]
+        for le, n in p["wait"]["buckets_ms"].items():
+            pool["wait"]["buckets_ms"][le] = pool["wait"]["buckets_ms"].get(le, 0) + n
+        if _masih_hidup(snap, now):
+            for key in ("checked_out", "overflow", "size"):
+                if key in p.get("pool", {}):
+                    gauges = pool.setdefault("pool", {})
+                    gauges[key] = gauges.get(key, 0) + p["pool"][key]
+
+        for key, value in snap["outbox"].items():
+            outbox[key] = max(outbox.get(key, 0), value) if key == "lag_seconds_max" else outbox.get(key, 0) + value
+
+    return {"routes": [routes[k] for k in sorted(routes)], "pool": pool, "outbox": outbox}
+
+
+def render(snap: dict) -> str:
+    lines = [
+        "# HELP http_request_duration_seconds Latensi request per route.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for m in snap["routes"]:
+        labels = f'method="{m["method"]}",route="{_escape(m["route"])}"'
+        cumulative = 0
+        for le, n in zip(LATENCY_BUCKETS, m["buckets"]):
+            cumulative += n
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {m["count"]}')
+        lines.append(f'http_request_duration_seconds_sum{{{labels}}} {m["latency_sum"]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{{{labels}}} {m["count"]}')
+
+    lines += ["# HELP http_requests_total Jumlah request per route dan status.", "# TYPE http_requests_total counter"]
+    for m in snap["routes"]:
+        for status, n in sorted(m["status"].items()):
+            lines.append(f'http_requests_total{{method="{m["method"]}",route="{_escape(m["route"])}",status="{status}"}} {n}')
+
+    for name, key, help_text in (
+        ("db_statements_total", "statements", "Jumlah statement SQL per route."),
+        ("db_duration_seconds_total", "db_seconds", "Total waktu eksekusi SQL per route."),
+        ("db_rows_total", "rows", "Baris dikembalikan/diubah (cursor.rowcount) per route."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for m in snap["routes"]:
+            value = m[key]
+            value = f"{value:.6f}" if isinstance(value, float) else value
+            lines.append(f'{name}{{method="{m["method"]}",route="{_escape(m["route"])}"}} {value}')
+
+    lines += _render_pool(snap["pool"])
+    lines += _render_outbox(snap["outbox"])
+    return "\n".join(lines) + "\n"
+
+
+def _render_pool(snap: dict) -> List[str]:
+    lines = []
+    for name, key in (("db_pool_checkouts_total", "checkouts"), ("db_pool_checkout_timeouts_total", "checkout_timeouts")):
+        lines += [f"# TYPE {name} counter", f"{name} {snap[key]}"]
+    for key in ("checked_out", "overflow", "size"):
+        if key in snap.get("pool", {}):
+            lines += [f"# TYPE db_pool_{key} gauge", f"db_pool_{key} {snap['pool'][key]}"]
+    lines.append("# TYPE db_pool_wait_seconds histogram")
+    for le in WAIT_BUCKETS_MS:
+        lines.append(f'db_pool_wait_seconds_bucket{{le="{le / 1000}"}} {snap["wait"]["buckets_ms"].get(str(le), 0)}')
+    lines.append(f'db_pool_wait_seconds_bucket{{le="+Inf"}} {snap["wait"]["count"]}')
+    lines.append(f'db_pool_wait_seconds_sum {snap["wait"]["sum_ms"] / 1000:.6f}')
+    lines.append(f'db_pool_wait_seconds_count {snap["wait"]["count"]}')
+    return lines
+
+
+def _render_outbox(snap: dict) -> List[str]:
+    lines = []
+    for name, key in (
+        ("outbox_batches_total", "batches"),
+        ("outbox_jobs_processed_total", "processed"),
+        ("outbox_jobs_retried_total", "retried"),
+        ("outbox_jobs_failed_total", "failed"),
+        ("outbox_job_lag_seconds_total", "lag_seconds_sum"),
+    ):
+        lines += [f"# TYPE {name} counter", f"{name} {snap.get(key, 0)}"]
+    lines += ["# TYPE outbox_job_lag_seconds_max gauge", f"outbox_job_lag_seconds_max {snap.get('lag_seconds_max', 0)}"]
+    return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+route_metrics = RouteMetricsRegistry()
+
+
+class MetricsFlusher:
+    """Menulis snapshot proses ini ke METRICS_DIR secara berkala (multi-worker)."""
+
+    def __init__(self, directory: Optional[str] = METRICS_DIR, flush_seconds: float = METRICS_FLUSH_SECONDS):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        # pid bisa dipakai ulang oleh worker baru; nama file harus unik per proses
+        self.nama = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def tulis(self, selesai: bool = False):
+        path = os.path.join(self.directory, self.nama)
+        with open(path + ".tmp", "w") as f:
+            json.dump(snapshot_proses(selesai), f)
+        os.replace(path + ".tmp", path)
+
+    def kumpulkan(self) -> List[dict]:
+        """Snapshot proses ini (terkini) ditambah snapshot terakhir worker lain."""
+        snaps = [snapshot_proses()]
+        if not self.directory:
+            return snaps
+        for nama in os.listdir(self.directory):
+            if not nama.endswith(".json") or nama == self.nama:
+                continue
+            try:
+                with open(os.path.join(self.directory, nama)) as f:
+                    snaps.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snaps
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.tulis()
+            except OSError as e:
+                logger.warning("Gagal menulis snapshot metrik: %s", e)
+
+    def start(self):
+        if not self.directory:
+            return
+        self.tulis()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        try:
+            self.tulis(selesai=True)
+        except OSError as e:
+            logger.warning("Gagal menulis snapshot metrik: %s", e)
+
+
+metrics_flusher = MetricsFlusher()
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        stats, token = start_request_stats(scope=scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            stop_request_stats(token)
+            route = scope.get("route")
+            # Path tanpa route dikelompokkan agar label tidak meledak oleh URL acak
+            route_path = getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+            route_metrics.observe(scope["method"], route_path, status_holder[0], elapsed, stats)
+
+
+def metrics_endpoint(request: Request):
+    if not METRICS_TOKEN or request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        return PlainTextResponse("Tidak terautentikasi", status_code=401)
+    snap = gabung_snapshot(metrics_flusher.kumpulkan())
+    return PlainTextResponse(render(snap), media_type="text/plain; version=0.0.4")
@@ -1,13 +1,15 @@
 # File: models.py
 from sqlalchemy import (
     JSON, Column, Date, Integer, String, Enum, DateTime, 
-    ForeignKey, Boolean, Text, UniqueConstraint, Index
+    ForeignKey, Boolean, Text, UniqueConstraint, Index, LargeBinary,
+    BigInteger, SmallInteger
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 from enum import Enum as PyEnum
 from app.database import Base  
+from app.jawaban_bit import decode_jawaban, encode_jawaban
 
 
 class PeranEnum(PyEnum):
@@ -25,13 +27,13 @@ class Pengguna(Base):
     dibuat_pada = Column(DateTime, default=datetime.utcnow)
     diperbarui_pada = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relationships
-    siswa = relationship("Siswa", back_populates="pengguna", uselist=False, cascade="all, delete")
-    guru = relationship("Guru", back_populates="pengguna", uselist=False, cascade="all, delete")
-    admin = relationship("Admin", back_populates="pengguna", uselist=False, cascade="all, delete")
-    reset_password = relationship("ResetPassword", back_populates="pengguna", cascade="all, delete")
-    jawaban = relationship("JawabanPengguna", back_populates="pengguna", cascade="all, delete")
-    hasil_gaya_belajar = relationship("HasilGayaBelajar", back_populates="pengguna", cascade="all, delete")
+    # Relationships (passive_deletes: anak dihapus oleh ON DELETE CASCADE di DB)
+    siswa = relationship("Siswa", back_populates="pengguna", uselist=False, cascade="all, delete", passive_deletes=True)
+    guru = relationship("Guru", back_populates="pengguna", uselist=False, cascade="all, delete", passive_deletes=True)
+    admin = relationship("Admin", back_populates="pengguna", uselist=False, cascade="all, delete", passive_deletes=True)
+    reset_password = relationship("ResetPassword", back_populates="pengguna", cascade="all, delete", passive_deletes=True)
+    jawaban = relationship("JawabanPengguna", back_populates="pengguna", cascade="all, delete", passive_deletes=True)
+    hasil_gaya_belajar = relationship("HasilGayaBelajar", back_populates="pengguna", cascade="all, delete", passive_deletes=True)
 
 class Siswa(Base):
     __tablename__ = "siswa"
@@ -94,15 +96,86 @@ class Soal(Base):
     pilihan_b = Column(Text, nullable=False)
     
 
+class VersiSoal(Base):
+    __tablename__ = "versi_soal"
+    
+    # Bertambah setiap kali set soal diubah (tambah, ubah, hapus, atau bulk)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jumlah_soal = Column(Integer, nullable=False)
+    dibuat_pada = Column(DateTime, default=datetime.utcnow)
+    
+
+class VersiData(Base):
+    __tablename__ = "versi_data"
+    
+    # Penghitung perubahan per entitas (pengguna, sekolah, katalog) untuk ETag
+    kunci = Column(String(64), primary_key=True)
+    versi = Column(Integer, nullable=False, default=0)
+    
+
+class OutboxJob(Base):
+    __tablename__ = "outbox_job"
+    
+    # Pekerjaan lanjutan yang ditulis di transaksi yang sama dengan datanya (lihat app.outbox)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jenis = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="menunggu")
+    percobaan = Column(Integer, nullable=False, default=0)
+    # Waktu paling awal job boleh diambil; saat diproses menjadi batas sewa klaim
+    jadwal = Column(DateTime, nullable=False, default=datetime.utcnow)
+    token_klaim = Column(String(32))
+    error_terakhir = Column(Text)
+    dibuat_pada = Column(DateTime, default=datetime.utcnow)
+    selesai_pada = Column(DateTime)
+    
+    __table_args__ = (
+        Index('ix_outbox_job_status_jadwal', 'status', 'jadwal'),
+    )
+    
+
 class JawabanPengguna(Base):
     __tablename__ = "jawaban_pengguna"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     id_pengguna = Column(Integer, ForeignKey("pengguna.id", ondelete="CASCADE"), nullable=False)
-    jawaban = Column(JSON, nullable=False)
+    # JSON hanya dipakai untuk jawaban yang tidak bisa di-encode sebagai bitmask
+    jawaban_json = Column("jawaban", JSON(none_as_null=True), nullable=True)
+    jawaban_bit = Column(BigInteger, comment="Bit ke-(id_soal-1) = 1 bila memilih A")
+    jumlah_jawaban = Column(SmallInteger)
+    versi_soal = Column(Integer, ForeignKey("versi_soal.id"), index=True, comment="Versi set soal yang dijawab")
     dijawab_pada = Column(DateTime, default=datetime.utcnow)
     
     pengguna = relationship("Pengguna", back_populates="jawaban")
+
+    @property
+    def jawaban(self):
+        if self.jawaban_bit is not None:
+            return decode_jawaban(self.jawaban_bit, self.jumlah_jawaban)
+        return self.jawaban_json
+
+    @jawaban.setter
+    def jawaban(self, value):
+        encoded = encode_jawaban(value)
+        if encoded:
+            self.jawaban_bit, self.jumlah_jawaban = encoded
+            self.jawaban_json = None
+        else:
+            self.jawaban_bit = self.jumlah_jawaban = None
+            self.jawaban_json = value
+    
+
+class ArsipJawabanPengguna(Base):
+    __tablename__ = "arsip_jawaban_pengguna"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # id asli di jawaban_pengguna; tidak unik karena id tabel aktif bisa dipakai ulang
+    id_jawaban_asal = Column(Integer, nullable=False, index=True, comment="id asli di jawaban_pengguna")
+    id_pengguna = Column(Integer, ForeignKey("pengguna.id", ondelete="CASCADE"), nullable=False, index=True)
+    jawaban_zlib = Column(LargeBinary, nullable=False, comment="JSON jawaban terkompresi zlib")
+    versi_soal = Column(Integer)
+    dijawab_pada = Column(DateTime)
+    diarsipkan_pada = Column(DateTime, default=datetime.utcnow)
     
 
 class HasilGayaBelajar(Base):
@@ -0,0 +1,324 @@
+# File: outbox.py
+"""
+Outbox untuk pekerjaan lanjutan di luar request.
+
+Endpoint menulis baris OutboxJob lewat tambah_job() di transaksi yang sama
+dengan datanya, lalu memanggil outbox_runner.notify() setelah commit.
+Pekerjaan tidak hilang walau worker mati: baris tetap ada sampai selesai.
+
+OutboxRunner berjalan sebagai task asyncio di setiap worker (dimulai dari
+lifespan) dan memproses job di threadpool:
+- klaim: job "menunggu" (atau "diproses" yang sewanya habis) dengan
+  jadwal <= sekarang diklaim dengan UPDATE bersyarat + token, sehingga
+  beberapa worker tidak mengambil job yang sama;
+- batching: job sejenis diberikan sekaligus ke handler-nya dalam satu
+  transaksi; bila batch gagal, job diproses satu per satu;
+- retry: job yang gagal dijadwalkan ulang dengan backoff eksponensial
+  sampai OUTBOX_MAX_ATTEMPTS, lalu ditandai "gagal".
+Job selesai dihapus setelah OUTBOX_RETENTION_HOURS. Metrik diekspos di
+/metrics.
+
+Dengan OUTBOX_ENABLED=false tidak ada runner yang menjamin job diproses,
+sehingga tambah_job() langsung menjalankan handler di transaksi pemanggil
+(perilaku sebelum ada outbox) alih-alih menulis baris outbox. Job yang
+tersisa dari sebelumnya dapat dikuras dengan:
+
+    python -m app.outbox
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+import anyio
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import OutboxJob, Siswa
+from app.versi_data import kunci_sekolah, naikkan_versi
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() in ("1", "true", "yes")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BASE_SECONDS = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "5"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_RETENTION_HOURS = int(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+
+MENUNGGU = "menunggu"
+DIPROSES = "diproses"
+SELESAI = "selesai"
+GAGAL = "gagal"
+
+HASIL_TES_DIBUAT = "hasil_tes_dibuat"
+
+_handlers: Dict[str, Callable[[Session, List[dict]], None]] = {}
+
+
+def job_handler(jenis: str):
+    """Daftarkan handler batch: handler(db, payloads); commit dilakukan runner."""
+    def decorator(func):
+        _handlers[jenis] = func
+        return func
+    return decorator
+
+
+def tambah_job(db: Session, jenis: str, payload: dict) -> Optional[OutboxJob]:
+    """Dipanggil sebelum commit; job ikut dalam transaksi yang sama."""
+    if not OUTBOX_ENABLED:
+        _handlers[jenis](db, [payload])
+        return None
+    job = OutboxJob(jenis=jenis, payload=payload, status=MENUNGGU, percobaan=0, jadwal=datetime.utcnow())
+    db.add(job)
+    return job
+
+
+class OutboxMetrics:
+    def __init__(self):
+        self._lock = Lock()
+        self.batches = 0
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+        self.lag_sum = 0.0
+        self.lag_max = 0.0
+
+    def observe_done(self, jobs: List[OutboxJob], now: datetime):
+        with self._lock:
+            self.processed += len(jobs)
+            for job in jobs:
+                lag = (now - job.dibuat_pada).total_seconds() if job.dibuat_pada else 0.0
+                self.lag_sum += lag
+                self.lag_max = max(self.lag_max, lag)
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "processed": self.processed,
+                "retried": self.retried,
+                "failed": self.failed,
+                "lag_seconds_sum": round(self.lag_sum, 6),
+                "lag_seconds_max": round(self.lag_max, 6),
+            }
+
+
+outbox_metrics = OutboxMetrics()
+
+
+def klaim(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> List[OutboxJob]:
+    now = datetime.utcnow()
+    siap = (OutboxJob.status.in_([MENUNGGU, DIPROSES]), OutboxJob.jadwal <= now)
+    ids = [id for (id,) in db.query(OutboxJob.id).filter(*siap).order_by(OutboxJob.id).limit(batch_size)]
+    if not ids:
+        db.rollback()
+        return []
+    token = uuid.uuid4().hex
+    # Syarat diulang di UPDATE: job yang sudah diklaim worker lain (jadwal maju) terlewati
+    db.execute(
+        update(OutboxJob)
+        .where(OutboxJob.id.in_(ids), *siap)
+        .values(
+            status=DIPROSES,
+            token_klaim=token,
+            jadwal=now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+            percobaan=OutboxJob.percobaan + 1,
+        ),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    return db.query(OutboxJob).filter(OutboxJob.token_klaim == token).order_by(OutboxJob.id).all()
+
+
+def _tandai_selesai(db: Session, jobs: List[OutboxJob]):
+    now = datetime.utcnow()
+    for job in jobs:
+        job.status = SELESAI
+        job.selesai_pada = now
+        job.token_klaim = None
+        job.error_terakhir = None
+    db.commit()
+    outbox_metrics.observe_done(jobs, now)
+
+
+def _tandai_gagal(db: Session, job: OutboxJob, error: str):
+    job.token_klaim = None
+    job.error_terakhir = error[:2000]
+    if job.percobaan >= OUTBOX_MAX_ATTEMPTS:
+        job.status = GAGAL
+        outbox_metrics.incr("failed")
+        logger.error("Job outbox %s (%s) gagal permanen: %s", job.id, job.jenis, error)
+    else:
+        job.status = MENUNGGU
+        job.jadwal = datetime.utcnow() + timedelta(seconds=OUTBOX_RETRY_BASE_SECONDS * 2 ** (job.percobaan - 1))
+        outbox_metrics.incr("retried")
+    db.commit()
+
+
+def _jalankan(db: Session, jobs: List[OutboxJob]):
+    handler = _handlers.get(jobs[0].jenis)
+    if handler is None:
+        raise LookupError(f"Handler outbox '{jobs[0].jenis}' tidak terdaftar")
+    handler(db, [job.payload for job in jobs])
+    _tandai_selesai(db, jobs)
+
+
+def proses(db: Session, jobs: List[OutboxJob]):
+    per_jenis: Dict[str, List[OutboxJob]] = {}
+    for job in jobs:
+        per_jenis.setdefault(job.jenis, []).append(job)
+    for grup in per_jenis.values():
+        outbox_metrics.incr("batches")
+        try:
+            _jalankan(db, grup)
+            continue
+        except Exception as e:
+            db.rollback()
+            if len(grup) == 1:
+                _tandai_gagal(db, grup[0], str(e))
+                continue
+        # Batch gagal: pisahkan job yang bermasalah
+        for job in grup:
+            try:
+                _jalankan(db, [job])
+            except Exception as e:
+                db.rollback()
+                _tandai_gagal(db, job, str(e))
+
+
+def bersihkan(db: Session) -> int:
+    batas = datetime.utcnow() - timedelta(hours=OUTBOX_RETENTION_HOURS)
+    dihapus = db.execute(
+        delete(OutboxJob).where(OutboxJob.status == SELESAI, OutboxJob.selesai_pada < batas),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    db.commit()
+    return dihapus
+
+
+def proses_sekali(session_factory=SessionLocal, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Klaim dan proses satu batch; kembalikan jumlah job yang diklaim."""
+    db = session_factory()
+    try:
+        jobs = klaim(db, batch_size)
+        if jobs:
+            proses(db, jobs)
+        return len(jobs)
+    finally:
+        db.close()
+
+
+class OutboxRunner:
+    CLEANUP_INTERVAL_SECONDS = 600
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = OUTBOX_BATCH_SIZE, poll_seconds: float = OUTBOX_POLL_SECONDS):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._last_cleanup = 0.0
+
+    def notify(self):
+        """Bangunkan runner setelah commit job baru; aman dari thread mana pun."""
+        if self._loop is not None and self._event is not None:
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._event.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = self._loop = self._event = None
+
+    def _tick(self) -> int:
+        n = proses_sekali(self.session_factory, self.batch_size)
+        if time.monotonic() - self._last_cleanup > self.CLEANUP_INTERVAL_SECONDS:
+            db = self.session_factory()
+            try:
+                bersihkan(db)
+            finally:
+                db.close()
+            self._last_cleanup = time.monotonic()
+        return n
+
+    async def _run(self):
+        while not self._stopping:
+            self._event.clear()
+            try:
+                n = await anyio.to_thread.run_sync(self._tick)
+            except Exception as e:
+                logger.warning("Runner outbox gagal: %s", e)
+                n = 0
+            if n >= self.batch_size:
+                # Masih ada antrean; langsung lanjut
+                continue
+            try:
+                await asyncio.wait_for(self._event.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+outbox_runner = OutboxRunner()
+
+
+@job_handler(HASIL_TES_DIBUAT)
+def perbarui_versi_sekolah(db: Session, payloads: List[dict]):
+    """Dashboard guru di sekolah siswa yang submit berubah; satu UPDATE per batch."""
+    ids = {p["id_pengguna"] for p in payloads}
+    sekolah = db.query(Siswa.nama_sekolah).filter(Siswa.id_pengguna.in_(ids)).distinct()
+    naikkan_versi(db, *(kunci_sekolah(nama) for (nama,) in sekolah))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Proses outbox sampai kosong")
+    parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    diklaim = 0
+    while True:
+        n = proses_sekali(batch_size=args.batch_size)
+        diklaim += n
+        if n < args.batch_size:
+            break
+    db = SessionLocal()
+    try:
+        dibersihkan = bersihkan(db)
+    finally:
+        db.close()
+    print(json.dumps({
+        "diklaim": diklaim,
+        **outbox_metrics.snapshot(),
+        "dibersihkan": dibersihkan,
+        "durasi_detik": round(time.perf_counter() - started, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
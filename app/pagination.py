@@ -0,0 +1,85 @@
+# File: pagination.py
+"""
+Helper paginasi untuk daftar admin.
+
+- Mode halaman (page/limit) tetap didukung untuk kompatibilitas.
+- Mode cursor (keyset) memakai kolom ber-indeks (primary key) sehingga
+  halaman dalam tidak perlu melewati OFFSET baris.
+- Total dapat dihitung exact, diambil dari cache TTL, atau diestimasi.
+  Cache total memakai app.cache.cache_backend, sehingga dibagi antar
+  worker bila Redis dipakai.
+"""
+import json
+import os
+from typing import Callable, Hashable, List, Optional, Tuple
+
+from sqlalchemy.orm import Query as SAQuery
+
+from app.cache import CacheBackend, cache_backend
+
+TOTAL_CACHE_TTL_SECONDS = int(os.getenv("TOTAL_CACHE_TTL_SECONDS", "60"))
+
+TOTAL_MODES = ("exact", "cached", "estimated")
+
+
+class TotalCache:
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = TOTAL_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return "total:" + json.dumps(key, default=str)
+
+    def get_or_count(self, key: Hashable, count: Callable[[], int]) -> int:
+        total = self.backend.get(self._key(key))
+        if total is None:
+            total = count()
+            self.backend.set(self._key(key), total, ttl=self.ttl_seconds)
+        return total
+
+    def invalidate(self, key: Hashable):
+        self.backend.delete(self._key(key))
+
+
+total_cache = TotalCache(cache_backend)
+
+
+def paginate(
+    query: SAQuery,
+    key_column,
+    page: int,
+    limit: int,
+    cursor: Optional[int] = None,
+) -> Tuple[List, Optional[int]]:
+    """Kembalikan (baris, next_cursor); next_cursor None bila halaman terakhir."""
+    query = query.order_by(key_column)
+    if cursor is not None:
+        query = query.filter(key_column > cursor)
+    else:
+        query = query.offset((page - 1) * limit)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, getattr(rows[-1], key_column.key)
+    return rows, None
+
+
+def count_total(
+    query: SAQuery,
+    mode: str,
+    cache_key: Hashable,
+    estimate: Optional[Callable[[], int]] = None,
+) -> int:
+    """
+    exact: COUNT setiap request.
+    cached: COUNT disimpan selama TOTAL_CACHE_TTL_SECONDS.
+    estimated: pakai estimate() bila tersedia (mis. counter dashboard),
+    jika tidak sama dengan cached.
+    """
+    if mode == "estimated" and estimate is not None:
+        return estimate()
+    if mode in ("cached", "estimated"):
+        return total_cache.get_or_count(cache_key, query.count)
+    return query.count()
@@ -0,0 +1,119 @@
+# File: pool_metrics.py
+"""
+Statistik connection pool SQLAlchemy.
+
+Jumlah checkout/checkin/connect/invalidate dicatat lewat pool events.
+Waktu tunggu checkout (termasuk yang berakhir timeout) diukur oleh
+InstrumentedQueuePool, karena pool events baru terpanggil setelah koneksi
+didapat. snapshot() dipakai oleh endpoint admin /admin/db-pool.
+"""
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Batas atas bucket histogram waktu tunggu, dalam milidetik
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 30000)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.wait_count = 0
+            self.wait_sum_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, ms: float, timeout: bool = False):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_sum_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            self.wait_buckets[bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+            if timeout:
+                self.timeouts += 1
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool=None) -> dict:
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "checkout_timeouts": self.timeouts,
+                "wait": {
+                    "count": self.wait_count,
+                    "sum_ms": round(self.wait_sum_ms, 3),
+                    "max_ms": round(self.wait_max_ms, 3),
+                    # Histogram kumulatif seperti format Prometheus
+                    "buckets_ms": {
+                        str(le): sum(self.wait_buckets[:i + 1])
+                        for i, le in enumerate(WAIT_BUCKETS_MS)
+                    } | {"+Inf": self.wait_count},
+                },
+            }
+        if isinstance(pool, QueuePool):
+            data["pool"] = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        elif pool is not None:
+            data["pool"] = {"class": type(pool).__name__, "status": pool.status()}
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool yang mencatat lama menunggu koneksi ke pool_metrics."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.observe_wait((time.perf_counter() - started) * 1000, timeout=True)
+            raise
+        pool_metrics.observe_wait((time.perf_counter() - started) * 1000)
+        return conn
+
+
+def instrument_engine(engine):
+    """Pasang listener pool events pada engine."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool_metrics.incr("connects")
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_metrics.incr("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        pool_metrics.incr("checkins")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.incr("invalidations")
@@ -0,0 +1,90 @@
+# File: query_budget.py
+"""
+Budget jumlah statement SQL per endpoint.
+
+Endpoint menyatakan batasnya dengan dekorator (dipasang di bawah
+@router.get/post agar fungsi yang didaftarkan membawa atributnya):
+
+    @router.get("/rekap-tes")
+    @query_budget(3)
+    async def get_rekap_tes(...):
+
+QUERY_BUDGET_MODE menentukan perilakunya:
+- off (default, produksi): tidak ada pemeriksaan;
+- log (development): request yang melebihi budget dicatat beserta
+  statement-statementnya;
+- raise (test): QueryBudgetExceeded dilempar setelah response, sehingga
+  TestClient menggagalkan test.
+
+Statement dihitung lewat hook before/after_cursor_execute di app.metrics.
+Untuk kode di luar request (job, fungsi service) pakai assert_max_queries.
+"""
+import logging
+import os
+from contextlib import contextmanager
+
+from app.metrics import current_stats, start_request_stats, stop_request_stats
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off").lower()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_statements: int):
+    def decorator(func):
+        func.query_budget = max_statements
+        return func
+    return decorator
+
+
+def periksa_budget(label: str, budget: int, stats, mode: str = QUERY_BUDGET_MODE):
+    if stats.statements <= budget:
+        return
+    daftar = "\n".join(f"  {i}. {q}" for i, q in enumerate(stats.queries or [], 1))
+    message = f"{label}: {stats.statements} statement SQL melebihi budget {budget}\n{daftar}"
+    if mode == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+@contextmanager
+def assert_max_queries(max_statements: int, label: str = "blok"):
+    stats, token = start_request_stats(record_statements=True)
+    try:
+        yield stats
+    finally:
+        stop_request_stats(token)
+    periksa_budget(label, max_statements, stats, mode="raise")
+
+
+class QueryBudgetMiddleware:
+    """Dipasang di dalam MetricsMiddleware; memakai RequestStats miliknya."""
+
+    def __init__(self, app, mode: str = QUERY_BUDGET_MODE):
+        self.app = app
+        self.mode = mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = current_stats(), None
+        if stats is None:
+            stats, token = start_request_stats(record_statements=True, scope=scope)
+        else:
+            stats.queries = []
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if token is not None:
+                stop_request_stats(token)
+
+        route = scope.get("route")
+        budget = getattr(getattr(route, "endpoint", None), "query_budget", None)
+        if budget is not None:
+            periksa_budget(f'{scope["method"]} {route.path_format}', budget, stats, self.mode)
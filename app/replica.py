@@ -0,0 +1,128 @@
+# File: replica.py
+"""
+Routing baca ke read replica.
+
+Endpoint yang hanya membaca memakai dependency get_read_db sebagai ganti
+get_db. Session diarahkan ke replica (DATABASE_REPLICA_URL) kecuali:
+- replica tidak diset, atau sedang ditandai mati (dicoba lagi setelah
+  REPLICA_RETRY_SECONDS), sehingga jatuh ke primary;
+- pengguna baru saja menulis (mis. submit_jawaban), sehingga selama
+  REPLICA_STICKY_SECONDS ia dibaca dari primary agar hasil tulisannya
+  sendiri langsung terlihat walau replica masih tertinggal.
+
+Penanda "baru menulis" dibawa klien, bukan disimpan per worker: setelah
+commit, tandai_tulis() memasang cookie httponly berisi waktu kedaluwarsa
+dan HMAC (kunci turunan JWT_SECRET_KEY) atas id pengguna dan waktu itu.
+Nilainya bukan JWT sehingga tidak dapat dipakai sebagai token login, dan
+hanya berlaku untuk pengguna yang sama. Request berikutnya ke worker mana
+pun membawa penanda itu kembali dan dibaca dari primary.
+"""
+import hashlib
+import hmac
+import logging
+import os
+import time
+from threading import Lock
+from typing import Optional
+
+from fastapi import Request, Response
+from jose import JWTError, jwt
+from sqlalchemy.exc import DBAPIError
+
+from app import database
+from app.security import ALGORITHM, SECRET_KEY, SECURE_COOKIE
+
+logger = logging.getLogger(__name__)
+
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "30"))
+
+STICKY_COOKIE = "baca_primary"
+# Kunci terpisah dari kunci tanda tangan JWT
+_STICKY_KEY = hmac.new(SECRET_KEY.encode(), b"baca_primary", hashlib.sha256).digest()
+
+
+class ReplicaState:
+    def __init__(self, retry_seconds: float = REPLICA_RETRY_SECONDS):
+        self.retry_seconds = retry_seconds
+        self._lock = Lock()
+        self._down_until = 0.0
+
+    def is_available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def mark_down(self):
+        with self._lock:
+            self._down_until = time.monotonic() + self.retry_seconds
+
+
+replica_state = ReplicaState()
+
+
+def _user_id_dari_request(request: Request) -> Optional[int]:
+    # Validasi token tetap dilakukan get_current_user; di sini cukup membaca sub
+    token = request.cookies.get("access_token")
+    if not token:
+        auth = request.headers.get("authorization", "")
+        if auth.lower().startswith("bearer "):
+            token = auth[7:]
+    if not token:
+        return None
+    try:
+        return int(jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return None
+
+
+def _tanda_tangan(user_id: int, exp: int) -> str:
+    return hmac.new(_STICKY_KEY, f"{user_id}:{exp}".encode(), hashlib.sha256).hexdigest()
+
+
+def tandai_tulis(response: Response, user_id: int, sticky_seconds: float = REPLICA_STICKY_SECONDS):
+    """Dipanggil setelah commit agar pembacaan berikutnya pengguna ini ke primary."""
+    exp = int(time.time() + sticky_seconds)
+    response.set_cookie(
+        key=STICKY_COOKIE,
+        value=f"{exp}.{_tanda_tangan(user_id, exp)}",
+        httponly=True,
+        max_age=int(sticky_seconds),
+        secure=SECURE_COOKIE,
+        samesite="none",
+        path="/"
+    )
+
+
+def baru_menulis(request: Request, user_id: Optional[int]) -> bool:
+    if user_id is None:
+        return False
+    exp, _, tanda = request.cookies.get(STICKY_COOKIE, "").partition(".")
+    if not exp.isdigit() or int(exp) < time.time():
+        # Kedaluwarsa: replica dianggap sudah menyusul
+        return False
+    return hmac.compare_digest(tanda, _tanda_tangan(user_id, int(exp)))
+
+
+def _open_read_session(request: Request):
+    if database.ReplicaSessionLocal is None or not replica_state.is_available():
+        return database.SessionLocal()
+    if baru_menulis(request, _user_id_dari_request(request)):
+        return database.SessionLocal()
+
+    db = database.ReplicaSessionLocal()
+    try:
+        # Ambil koneksi sekarang (dengan pre-ping) agar kegagalan replica terdeteksi di awal
+        db.connection()
+        return db
+    except DBAPIError as e:
+        db.close()
+        replica_state.mark_down()
+        logger.warning("Read replica tidak tersedia, memakai primary: %s", e)
+        return database.SessionLocal()
+
+
+def get_read_db(request: Request):
+    db = _open_read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
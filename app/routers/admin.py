@@ -1,19 +1,67 @@
 from datetime import datetime
 from pkgutil import get_data
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, or_
+from typing import List, Literal, Optional
+import csv
+import io
+import json
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy import delete, func, or_
 from sqlalchemy.orm import Session, aliased
-from app.database import get_db
-from app.models import Guru, HasilGayaBelajar, JawabanPengguna, Pengguna, Admin, PeranEnum, RekomendasiGayaBelajar, Siswa, Soal
-from app.schemas.admin import AdminCreate, AdminDashboardResponse, AdminListPaginatedResponse, AdminListResponse, AdminNavbarResponse, AdminProfileResponse, AdminProfileUpdate, AdminResponse, GuruListResponse, GuruResponse,  RekomendasiCreateRequest, RekomendasiResponse, RekomendasiUpdateRequest, SiswaListResponse, SiswaResponse,  SoalCreateRequest, SoalResponse,  SoalUpdateRequest
+from app.akun_import import import_akun, read_roster
+from app.arsip_jawaban import get_jawaban
+from app.cache import cache_coherence
+from app.counters import TES_SELESAI, admin_counters
+from app.database import engine, get_db
+from app.fast_response import ModelResponse, baris_ke_dict
+from app.katalog_rekomendasi import katalog_rekomendasi, upsert_rekomendasi
+from app.pagination import count_total, paginate
+from app.pool_metrics import pool_metrics
+from app.replica import get_read_db
+from app.versi_data import KATALOG, kunci_sekolah, naikkan_versi
+from app.versi_soal import catat_versi_baru, get_jumlah_soal
+from app.models import ArsipJawabanPengguna, Guru, HasilGayaBelajar, JawabanPengguna, Pengguna, Admin, PeranEnum, RekomendasiGayaBelajar, Siswa, Soal
+from app.slow_query import slow_query_log
+from app.tracing import TracedRoute
+from app.sekolah_import import DEFAULT_BATCH_SIZE, import_sekolah, read_nama_sekolah
+from app.schemas.admin import AkunImportResponse, AdminCreate, BulkDeleteRequest, BulkDeleteResponse, AdminDashboardResponse, AdminListPaginatedResponse, AdminNavbarResponse, AdminProfileResponse, AdminProfileUpdate, AdminResponse, GuruListResponse, JawabanDetailResponse,  RekomendasiBulkResponse, RekomendasiCreateRequest, RekomendasiResponse, RekomendasiUpdateRequest, SekolahImportResponse, SoalBulkRequest, SoalBulkResponse, SiswaListResponse,  SoalCreateRequest, SoalResponse,  SoalUpdateRequest
 from app import security
 
 router = APIRouter(
     prefix="/admin",
-    tags=["Admin Management"]
+    tags=["Admin Management"],
+    route_class=TracedRoute
 )
 
+DELETE_CHUNK_SIZE = 1000
+
+def _hapus_pengguna(db: Session, pengguna_ids: List[int], peran: PeranEnum) -> int:
+    """
+    Hapus pengguna dengan DELETE set-based tanpa memuat objek ORM.
+    Data terkait (siswa/guru/admin, jawaban, hasil, reset password) dihapus
+    oleh ON DELETE CASCADE di DB. Mengembalikan jumlah pengguna terhapus.
+    """
+    dihapus = jumlah_tes = 0
+    for i in range(0, len(pengguna_ids), DELETE_CHUNK_SIZE):
+        chunk = pengguna_ids[i:i + DELETE_CHUNK_SIZE]
+        jumlah_tes += db.query(func.count(JawabanPengguna.id)).filter(
+            JawabanPengguna.id_pengguna.in_(chunk)
+        ).scalar()
+        jumlah_tes += db.query(func.count(ArsipJawabanPengguna.id)).filter(
+            ArsipJawabanPengguna.id_pengguna.in_(chunk)
+        ).scalar()
+        if peran == PeranEnum.siswa:
+            # Dashboard guru di sekolah siswa yang dihapus ikut berubah
+            sekolah = db.query(Siswa.nama_sekolah).filter(Siswa.id_pengguna.in_(chunk)).distinct()
+            naikkan_versi(db, *(kunci_sekolah(nama) for (nama,) in sekolah))
+        dihapus += db.execute(
+            delete(Pengguna).where(Pengguna.id.in_(chunk)),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+    db.commit()
+    admin_counters.incr(peran.value, -dihapus)
+    admin_counters.incr(TES_SELESAI, -jumlah_tes)
+    return dihapus
+
 @router.post(
     "/register",
     response_model=AdminResponse,
@@ -49,6 +97,7 @@ def register_admin(admin_data: AdminCreate, db: Session = Depends(get_db)):
         )
         db.add(db_admin)
         db.commit()
+        admin_counters.incr(PeranEnum.admin.value)
         db.refresh(db_pengguna)
         db.refresh(db_admin)
 
@@ -262,18 +311,14 @@ def get_admin_dashboard(
 ):
 
     try:
-        # Hitung jumlah pengguna berdasarkan peran
-        total_siswa = db.query(Pengguna).filter(Pengguna.peran == PeranEnum.siswa).count()
-        total_guru = db.query(Pengguna).filter(Pengguna.peran == PeranEnum.guru).count()
-        total_admin = db.query(Pengguna).filter(Pengguna.peran == PeranEnum.admin).count()
-        
-        total_tes_selesai = db.query(JawabanPengguna).count()
+        # Hitung jumlah pengguna per peran dari cache (satu query GROUP BY saat rekonsiliasi)
+        counts = admin_counters.get(db)
         
         return AdminDashboardResponse(
-            total_siswa=total_siswa,
-            total_guru=total_guru,
-            total_admin=total_admin,
-            total_tes_selesai=total_tes_selesai
+            total_siswa=counts[PeranEnum.siswa.value],
+            total_guru=counts[PeranEnum.guru.value],
+            total_admin=counts[PeranEnum.admin.value],
+            total_tes_selesai=counts[TES_SELESAI]
         )
     
     except Exception as e:
@@ -282,12 +327,39 @@ def get_admin_dashboard(
             detail=f"Terjadi kesalahan server: {str(e)}"
         )
 
+@router.get("/db-pool")
+def get_db_pool_stats(
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint internal statistik connection pool database:
+    - Jumlah koneksi aktif, overflow, checkout timeout
+    - Histogram waktu tunggu checkout (ms)
+    - Harus login sebagai admin
+    """
+    return pool_metrics.snapshot(engine.pool)
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint internal query lambat (di atas SLOW_QUERY_MS):
+    - Statement terlambat per route beserta bentuk parameter dan durasinya
+    - Hasil EXPLAIN terbaru lebih dulu
+    - Data per worker, hilang saat restart
+    - Harus login sebagai admin
+    """
+    return slow_query_log.snapshot()
+
 @router.get("/siswa", response_model=SiswaListResponse)
 def get_all_siswa(
     search: str = Query(None, description="Cari berdasarkan nama siswa"),
     page: int = Query(1, ge=1, description="Nomor halaman"),
     limit: int = Query(10, ge=1, le=100, description="Jumlah item per halaman"),
-    db: Session = Depends(get_db),
+    cursor: Optional[int] = Query(None, description="ID terakhir halaman sebelumnya (paginasi keyset, mengabaikan page)"),
+    total_mode: Literal["exact", "cached", "estimated"] = Query("exact", description="Cara menghitung total"),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(security.require_role(PeranEnum.admin))
 ):
 
@@ -303,25 +375,21 @@ def get_all_siswa(
         if search:
             query = query.filter(Siswa.nama_lengkap.ilike(f"%{search}%"))
 
-        total = query.count()
-
-        offset = (page - 1) * limit
-        siswa_data = query.offset(offset).limit(limit).all()
+        # Hitung total data
+        total = count_total(
+            query, total_mode, ("siswa", search),
+            estimate=None if search else lambda: admin_counters.get(db)[PeranEnum.siswa.value]
+        )
 
-        formatted_data = [
-            SiswaResponse(
-                id=row.id,
-                email=row.email,
-                nama_lengkap=row.nama_lengkap,
-                jenis_kelamin=row.jenis_kelamin,
-                nama_sekolah=row.nama_sekolah
-            ) for row in siswa_data
-        ]
+        # Paginasi (keyset bila cursor diberikan, jika tidak offset per halaman)
+        siswa_data, next_cursor = paginate(query, Siswa.id, page, limit, cursor)
 
-        return SiswaListResponse(
-            data=formatted_data,
-            total=total
-        )
+        # Divalidasi dan diserialisasi sekali oleh pydantic-core langsung dari baris query
+        return ModelResponse({
+            "data": baris_ke_dict(siswa_data),
+            "total": total,
+            "next_cursor": next_cursor
+        }, SiswaListResponse)
 
     except Exception as e:
         raise HTTPException(
@@ -336,22 +404,15 @@ def delete_siswa(
     current_user: dict = Depends(security.require_role(PeranEnum.admin))
 ):
     try:
-        siswa = db.query(Siswa).filter(Siswa.id == siswa_id).first()
-        if not siswa:
+        pengguna_id = db.query(Siswa.id_pengguna).filter(Siswa.id == siswa_id).scalar()
+        if pengguna_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Siswa tidak ditemukan"
             )
 
-        pengguna_id = siswa.id_pengguna
-
-
-        db_pengguna = db.query(Pengguna).filter(Pengguna.id == pengguna_id).first()
-        
-        if db_pengguna:
-            db.delete(db_pengguna)
-            db.commit()
-        else:
+        # Hapus data pengguna (data terkait terhapus oleh ON DELETE CASCADE)
+        if not _hapus_pengguna(db, [pengguna_id], PeranEnum.siswa):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Akun pengguna tidak ditemukan"
@@ -373,7 +434,9 @@ def get_all_guru(
     search: str = Query(None, description="Cari berdasarkan nama guru"),
     page: int = Query(1, ge=1, description="Nomor halaman"),
     limit: int = Query(10, ge=1, le=100, description="Jumlah item per halaman"),
-    db: Session = Depends(get_db),
+    cursor: Optional[int] = Query(None, description="ID terakhir halaman sebelumnya (paginasi keyset, mengabaikan page)"),
+    total_mode: Literal["exact", "cached", "estimated"] = Query("exact", description="Cara menghitung total"),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(security.require_role(PeranEnum.admin))
 ):
     """
@@ -396,28 +459,21 @@ def get_all_guru(
             query = query.filter(Guru.nama_lengkap.ilike(f"%{search}%"))
 
         # Hitung total data
-        total = query.count()
-
-        # Paginasi
-        offset = (page - 1) * limit
-        guru_data = query.offset(offset).limit(limit).all()
-
-        # Format response
-        formatted_data = [
-            GuruResponse(
-                id=row.id,
-                email=row.email,
-                nama_lengkap=row.nama_lengkap,
-                jenis_kelamin=row.jenis_kelamin,
-                nama_sekolah=row.nama_sekolah
-            ) for row in guru_data
-        ]
-
-        return GuruListResponse(
-            data=formatted_data,
-            total=total
+        total = count_total(
+            query, total_mode, ("guru", search),
+            estimate=None if search else lambda: admin_counters.get(db)[PeranEnum.guru.value]
         )
 
+        # Paginasi (keyset bila cursor diberikan, jika tidak offset per halaman)
+        guru_data, next_cursor = paginate(query, Guru.id, page, limit, cursor)
+
+        # Divalidasi dan diserialisasi sekali oleh pydantic-core langsung dari baris query
+        return ModelResponse({
+            "data": baris_ke_dict(guru_data),
+            "total": total,
+            "next_cursor": next_cursor
+        }, GuruListResponse)
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -437,23 +493,15 @@ def delete_guru(
     """
     try:
         # Cari data guru
-        guru = db.query(Guru).filter(Guru.id == guru_id).first()
-        if not guru:
+        pengguna_id = db.query(Guru.id_pengguna).filter(Guru.id == guru_id).scalar()
+        if pengguna_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Guru tidak ditemukan"
             )
 
-        # Dapatkan ID pengguna terkait
-        pengguna_id = guru.id_pengguna
-
-        # Hapus data pengguna (akan menghapus guru karena cascade)
-        db_pengguna = db.query(Pengguna).filter(Pengguna.id == pengguna_id).first()
-        
-        if db_pengguna:
-            db.delete(db_pengguna)
-            db.commit()
-        else:
+        # Hapus data pengguna (data terkait terhapus oleh ON DELETE CASCADE)
+        if not _hapus_pengguna(db, [pengguna_id], PeranEnum.guru):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Akun pengguna tidak ditemukan"
@@ -475,7 +523,9 @@ def get_all_admin(
     search: str = Query(None, description="Cari berdasarkan nama admin"),
     page: int = Query(1, ge=1, description="Nomor halaman"),
     limit: int = Query(10, ge=1, le=100, description="Jumlah item per halaman"),
-    db: Session = Depends(get_db),
+    cursor: Optional[int] = Query(None, description="ID terakhir halaman sebelumnya (paginasi keyset, mengabaikan page)"),
+    total_mode: Literal["exact", "cached", "estimated"] = Query("exact", description="Cara menghitung total"),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(security.require_role(PeranEnum.admin))
 ):
     """
@@ -498,28 +548,21 @@ def get_all_admin(
             query = query.filter(Admin.nama_lengkap.ilike(f"%{search}%"))
 
         # Hitung total data
-        total = query.count()
-
-        # Paginasi
-        offset = (page - 1) * limit
-        admin_data = query.offset(offset).limit(limit).all()
-
-        # Format response
-        formatted_data = [
-            AdminListResponse(
-                id=row.id,
-                email=row.email,
-                nama_lengkap=row.nama_lengkap,
-                nomor_telepon=row.nomor_telepon,
-                jenis_kelamin=row.jenis_kelamin
-            ) for row in admin_data
-        ]
-
-        return AdminListPaginatedResponse(
-            data=formatted_data,
-            total=total
+        total = count_total(
+            query, total_mode, ("admin", search),
+            estimate=None if search else lambda: admin_counters.get(db)[PeranEnum.admin.value]
         )
 
+        # Paginasi (keyset bila cursor diberikan, jika tidak offset per halaman)
+        admin_data, next_cursor = paginate(query, Admin.id, page, limit, cursor)
+
+        # Divalidasi dan diserialisasi sekali oleh pydantic-core langsung dari baris query
+        return ModelResponse({
+            "data": baris_ke_dict(admin_data),
+            "total": total,
+            "next_cursor": next_cursor
+        }, AdminListPaginatedResponse)
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -546,23 +589,15 @@ def delete_admin(
             )
 
         # Cari data admin
-        admin = db.query(Admin).filter(Admin.id == admin_id).first()
-        if not admin:
+        pengguna_id = db.query(Admin.id_pengguna).filter(Admin.id == admin_id).scalar()
+        if pengguna_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Admin tidak ditemukan"
             )
 
-        # Dapatkan ID pengguna terkait
-        pengguna_id = admin.id_pengguna
-
-        # Hapus data pengguna (akan menghapus admin karena cascade)
-        db_pengguna = db.query(Pengguna).filter(Pengguna.id == pengguna_id).first()
-        
-        if db_pengguna:
-            db.delete(db_pengguna)
-            db.commit()
-        else:
+        # Hapus data pengguna (data terkait terhapus oleh ON DELETE CASCADE)
+        if not _hapus_pengguna(db, [pengguna_id], PeranEnum.admin):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Akun pengguna tidak ditemukan"
@@ -579,6 +614,75 @@ def delete_admin(
             detail=f"Terjadi kesalahan server: {str(e)}"
         )
 
+
+@router.post("/hapus-massal", response_model=BulkDeleteResponse)
+def delete_pengguna_massal(
+    request: BulkDeleteRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint untuk menghapus banyak siswa, guru, atau admin sekaligus.
+    - Harus login sebagai admin.
+    - ids adalah ID siswa/guru/admin, sama seperti endpoint hapus tunggal.
+    - Akun sendiri tidak ikut dihapus.
+    """
+    model = {"siswa": Siswa, "guru": Guru, "admin": Admin}[request.peran]
+    ids = list(dict.fromkeys(request.ids))
+
+    try:
+        found = {}
+        for i in range(0, len(ids), DELETE_CHUNK_SIZE):
+            chunk = ids[i:i + DELETE_CHUNK_SIZE]
+            found.update(
+                db.query(model.id, model.id_pengguna).filter(model.id.in_(chunk)).all()
+            )
+
+        current_id = current_user.id
+        pengguna_ids = [pid for pid in found.values() if pid != current_id]
+        dihapus = _hapus_pengguna(db, pengguna_ids, PeranEnum(request.peran))
+
+        return BulkDeleteResponse(
+            dihapus=dihapus,
+            tidak_ditemukan=[i for i in ids if i not in found],
+            dilewati=[i for i, pid in found.items() if pid == current_id]
+        )
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan server: {str(e)}"
+        )
+
+@router.get("/jawaban/{jawaban_id}", response_model=JawabanDetailResponse)
+def get_jawaban_detail(
+    jawaban_id: int,
+    arsip: bool = Query(False, description="Baca dari arsip walau id ada di tabel aktif"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint untuk audit lembar jawaban.
+    - Harus login sebagai admin.
+    - Membaca dari tabel aktif atau arsip terkompresi secara transparan.
+    """
+    try:
+        jawaban = get_jawaban(db, jawaban_id, arsip)
+        if not jawaban:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Jawaban tidak ditemukan"
+            )
+        return jawaban
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan server: {str(e)}"
+        )
     
 @router.get("/soal", response_model=List[SoalResponse])
 def get_all_soal(
@@ -647,6 +751,7 @@ def update_soal(
         if soal_update.pilihan_b:
             db_soal.pilihan_b = soal_update.pilihan_b
         
+        catat_versi_baru(db)
         db.commit()
         db.refresh(db_soal)
         
@@ -676,8 +781,8 @@ def create_soal(
     - Maksimal 44 soal dapat ditambahkan.
     """
     try:
-        # Validasi jumlah soal (batas 44)
-        total_soal = db.query(Soal).count()
+        # Validasi jumlah soal (batas 44), diambil dari versi set soal terkini
+        total_soal = get_jumlah_soal(db)
         if total_soal >= 44:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -698,6 +803,7 @@ def create_soal(
             pilihan_b=soal_data.pilihan_b
         )
         db.add(db_soal)
+        catat_versi_baru(db)
         db.commit()
         db.refresh(db_soal)
         
@@ -715,6 +821,69 @@ def create_soal(
             detail=f"Terjadi kesalahan server: {str(e)}"
         )
 
+@router.put("/soal/bulk", response_model=SoalBulkResponse)
+def bulk_upsert_soal(
+    request: SoalBulkRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint untuk mengganti atau meng-upsert seluruh set soal sekaligus.
+    - Harus login sebagai admin.
+    - mode "replace": set soal diganti seluruhnya, ID diberikan 1..n sesuai urutan.
+    - mode "upsert": soal dengan id diperbarui/dibuat, tanpa id ditambahkan.
+    - Semua perubahan dan versi set soal baru dicatat dalam satu transaksi.
+    """
+    try:
+        ditambahkan = diperbarui = dihapus = 0
+
+        if request.mode == "replace":
+            dihapus = db.query(Soal).delete(synchronize_session=False)
+            db.add_all([
+                Soal(id=i, pertanyaan=item.pertanyaan, pilihan_a=item.pilihan_a, pilihan_b=item.pilihan_b)
+                for i, item in enumerate(request.soal, start=1)
+            ])
+            ditambahkan = len(request.soal)
+        else:
+            existing = {soal.id: soal for soal in db.query(Soal).all()}
+            baru = sum(1 for item in request.soal if item.id not in existing)
+            if len(existing) + baru > 44:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Jumlah soal melebihi batas maksimal 44 soal"
+                )
+            for item in request.soal:
+                db_soal = existing.get(item.id) if item.id is not None else None
+                if db_soal:
+                    db_soal.pertanyaan = item.pertanyaan
+                    db_soal.pilihan_a = item.pilihan_a
+                    db_soal.pilihan_b = item.pilihan_b
+                    diperbarui += 1
+                else:
+                    db.add(Soal(id=item.id, pertanyaan=item.pertanyaan, pilihan_a=item.pilihan_a, pilihan_b=item.pilihan_b))
+                    ditambahkan += 1
+
+        versi = catat_versi_baru(db)
+        db.commit()
+
+        return SoalBulkResponse(
+            versi=versi.id,
+            jumlah_soal=versi.jumlah_soal,
+            ditambahkan=ditambahkan,
+            diperbarui=diperbarui,
+            dihapus=dihapus
+        )
+
+    except HTTPException as he:
+        db.rollback()
+        raise he
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan server: {str(e)}"
+        )
+
 @router.delete("/hapus soal{soal_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_soal(
     soal_id: int,
@@ -738,6 +907,7 @@ def delete_soal(
         
         # Hapus soal
         db.delete(db_soal)
+        catat_versi_baru(db)
         db.commit()
         
         return None
@@ -784,6 +954,100 @@ def get_all_rekomendasi(
             detail=f"Terjadi kesalahan server: {str(e)}"
         )
 
+REKOMENDASI_FIELDS = ["kategori", "gaya_belajar", "penjelasan", "rekomendasi"]
+
+@router.get("/rekomendasi/export")
+def export_rekomendasi(
+    format: Literal["json", "csv"] = Query("json", description="Format file ekspor"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint untuk mengekspor seluruh katalog rekomendasi.
+    - Harus login sebagai admin.
+    - Hasil dapat diimpor kembali lewat /admin/rekomendasi/import.
+    """
+    try:
+        rows = [r._asdict() for r in katalog_rekomendasi.all(db)]
+
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=["id"] + REKOMENDASI_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+            content, media_type = buffer.getvalue(), "text/csv"
+        else:
+            content, media_type = json.dumps(rows, ensure_ascii=False, indent=2), "application/json"
+
+        return Response(
+            content=content,
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="rekomendasi.{format}"'}
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan server: {str(e)}"
+        )
+
+@router.put("/rekomendasi/bulk", response_model=RekomendasiBulkResponse)
+def bulk_upsert_rekomendasi(
+    rekomendasi_list: List[RekomendasiCreateRequest],
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint untuk upsert massal katalog rekomendasi.
+    - Harus login sebagai admin.
+    - Dicocokkan berdasarkan kategori + gaya_belajar (uq_kategori_gaya).
+    - Semua baris ditulis dalam satu transaksi.
+    """
+    try:
+        return upsert_rekomendasi(db, [item.model_dump() for item in rekomendasi_list])
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan server: {str(e)}"
+        )
+
+@router.post("/rekomendasi/import", response_model=RekomendasiBulkResponse)
+def import_rekomendasi(
+    file: UploadFile = File(..., description="File JSON atau CSV hasil ekspor"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint untuk mengimpor katalog rekomendasi dari file JSON atau CSV.
+    - Harus login sebagai admin.
+    - Kolom id diabaikan; baris dicocokkan berdasarkan kategori + gaya_belajar.
+    """
+    try:
+        content = file.file.read().decode("utf-8-sig")
+        if (file.filename or "").lower().endswith(".csv"):
+            raw_rows = list(csv.DictReader(io.StringIO(content)))
+        else:
+            raw_rows = json.loads(content)
+        items = [
+            RekomendasiCreateRequest(**{f: row.get(f) for f in REKOMENDASI_FIELDS}).model_dump()
+            for row in raw_rows
+        ]
+    except (ValueError, TypeError, AttributeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File rekomendasi tidak valid: {str(e)}"
+        )
+
+    try:
+        return upsert_rekomendasi(db, items)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan server: {str(e)}"
+        )
+
 # Endpoint untuk menambahkan rekomendasi baru
 @router.post("/tambah rekomendasi", response_model=RekomendasiResponse, status_code=status.HTTP_201_CREATED)
 def create_rekomendasi(
@@ -818,7 +1082,9 @@ def create_rekomendasi(
             rekomendasi=rekomendasi_data.rekomendasi
         )
         db.add(db_rekomendasi)
+        naikkan_versi(db, KATALOG)
         db.commit()
+        cache_coherence.invalidate(KATALOG)
         db.refresh(db_rekomendasi)
         
         return RekomendasiResponse(
@@ -883,7 +1149,9 @@ def update_rekomendasi(
             if getattr(rekomendasi_update, field) is not None:
                 setattr(db_rekomendasi, field, getattr(rekomendasi_update, field))
         
+        naikkan_versi(db, KATALOG)
         db.commit()
+        cache_coherence.invalidate(KATALOG)
         db.refresh(db_rekomendasi)
         
         return RekomendasiResponse(
@@ -927,7 +1195,9 @@ def delete_rekomendasi(
         
         # Hapus rekomendasi
         db.delete(db_rekomendasi)
+        naikkan_versi(db, KATALOG)
         db.commit()
+        cache_coherence.invalidate(KATALOG)
         
         return None
     
@@ -937,3 +1207,63 @@ def delete_rekomendasi(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Terjadi kesalahan server: {str(e)}"
         )
+
+@router.post("/sekolah/import", response_model=SekolahImportResponse)
+def import_sekolah_csv(
+    file: UploadFile = File(..., description="CSV dengan kolom nama_sekolah"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=100, le=20000, description="Jumlah baris per INSERT"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint untuk impor massal daftar sekolah dari file CSV.
+    - Harus login sebagai admin.
+    - Nama dinormalisasi dan duplikat (termasuk yang sudah ada) dilewati.
+    - Mengembalikan jumlah baris yang ditambahkan, duplikat, ditolak, dan throughput.
+    """
+    try:
+        text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        return import_sekolah(db, read_nama_sekolah(text), batch_size)
+
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File harus berupa CSV dengan encoding UTF-8"
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File sekolah tidak valid: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan server: {str(e)}"
+        )
+
+@router.post("/import-akun", response_model=AkunImportResponse)
+def import_akun_roster(
+    peran: Literal["siswa", "guru"] = Query(..., description="Peran akun yang diimpor"),
+    file: UploadFile = File(..., description="Roster CSV atau XLSX dengan kolom sesuai form registrasi"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint untuk impor massal akun siswa atau guru dari roster.
+    - Harus login sebagai admin.
+    - Kolom mengikuti form registrasi; confirm_password boleh dikosongkan.
+    - Mengembalikan laporan status per baris.
+    """
+    try:
+        return import_akun(db, read_roster(file.file, file.filename or ""), PeranEnum(peran))
+
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File roster tidak valid: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Terjadi kesalahan server: {str(e)}"
+        )
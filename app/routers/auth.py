@@ -1,16 +1,20 @@
 # File: routers/auth.py (perubahan)
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from app.cache import cache_coherence
 from app.database import get_db
 from app import security
 from app.models import Pengguna, ResetPassword, Sekolah
+from app.sekolah_index import sekolah_index
+from app.tracing import TracedRoute
+from app.versi_data import INDEKS_SEKOLAH, naikkan_versi
 from app.schemas.auth import LoginSchema, PasswordResetRequest, PasswordResetConfirm, SchoolNameResponse, SchoolSchema
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=TracedRoute)
 @router.post("/login", status_code=status.HTTP_200_OK)
 async def login(
     response: Response,
@@ -47,17 +51,18 @@ async def logout(response: Response):
 @router.get("/sekolah", response_model=list[SchoolNameResponse])
 def get_all_sekolah(
     nama: str | None = None, 
+    # Default terbatas agar pencarian berhenti di jalur bisect indeks, bukan memindai semua nama
+    limit: int = Query(20, ge=1, le=1000, description="Jumlah maksimal hasil"),
     db: Session = Depends(get_db)
 ):
     try:
-        query = db.query(Sekolah)
-        
-        if nama:
-            query = query.filter(Sekolah.nama_sekolah.ilike(f"%{nama}%"))
-        
-        schools = query.order_by(Sekolah.nama_sekolah).all()
+        # Indeks dimuat saat startup; muat ulang bila startup gagal menjangkau DB
+        if not sekolah_index.loaded:
+            sekolah_index.load_from_db(db)
+
+        schools = sekolah_index.search(nama, limit)
         
-        return [{"nama_sekolah": school.nama_sekolah} for school in schools]
+        return [{"nama_sekolah": nama_sekolah} for nama_sekolah in schools]
         
     except SQLAlchemyError as e:
         raise HTTPException(
@@ -84,7 +89,10 @@ def create_sekolah(
             
         new_sekolah = Sekolah(nama_sekolah=sekolah.nama_sekolah)
         db.add(new_sekolah)
+        naikkan_versi(db, INDEKS_SEKOLAH)
         db.commit()
+        sekolah_index.add(new_sekolah.nama_sekolah)
+        cache_coherence.publish(INDEKS_SEKOLAH)
         return {"message": "Sekolah berhasil ditambahkan", "data": new_sekolah}
         
     except SQLAlchemyError as e:
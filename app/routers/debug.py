@@ -0,0 +1,26 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from app.models import PeranEnum
+from app.tracing import TracedRoute, tracer
+from app import security
+
+router = APIRouter(prefix="/debug", tags=["Debug"], route_class=TracedRoute)
+
+@router.get("/traces")
+def get_traces(
+    limit: int = Query(20, ge=1, le=200, description="Jumlah trace"),
+    min_ms: Optional[float] = Query(None, description="Hanya trace dengan durasi minimal (ms)"),
+    current_user: dict = Depends(security.require_role(PeranEnum.admin))
+):
+    """
+    Endpoint internal trace request lambat (di atas TRACE_SLOW_MS):
+    - Trace terbaru lebih dulu, lengkap dengan span dependency, SQL, dan render
+    - Hanya request yang terpilih sampling TRACE_SAMPLE_RATE
+    - Data per worker, hilang saat restart
+    - Harus login sebagai admin
+    """
+    return {
+        "sample_rate": tracer.sample_rate,
+        "slow_ms": tracer.slow_ms,
+        "traces": tracer.recent(limit, min_ms),
+    }
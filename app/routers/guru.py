@@ -3,18 +3,25 @@ from datetime import datetime
 from re import search
 from typing import List, Optional
 from typing_extensions import Literal
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import distinct, func
 from sqlalchemy.orm import Session
 from app import security
+from app.counters import admin_counters
 from app.database import get_db
+from app.fast_response import FastJSONResponse, ModelResponse
+from app.query_budget import query_budget
+from app.replica import get_read_db
 from app.security import get_current_user
+from app.tracing import TracedRoute
 from app.models import HasilGayaBelajar, Pengguna, Guru, PeranEnum, RekomendasiGayaBelajar, Siswa
+from app.versi_data import CACHE_CONTROL, KATALOG, buat_etag, etag_cocok, kunci_sekolah, pasang_etag, respons_304
 from app.schemas.guru import   GuruNavbarResponse, GuruProfilResponse, GuruProfilUpdate, GuruRegister, GuruSidebarResponse, SiswaExportSimpleResponse, SiswaKategoriResponse, StatistikResponse
 
 router = APIRouter(
     prefix="/guru",
-    tags=["Guru"]
+    tags=["Guru"],
+    route_class=TracedRoute
 )
 
 KATEGORI_MAPPING = {
@@ -83,6 +90,7 @@ async def register_guru(
         
         db.add(new_guru)
         db.commit()
+        admin_counters.incr(PeranEnum.guru.value)
         
         return {"message": "Registrasi guru berhasil"}
     
@@ -196,7 +204,13 @@ async def get_guru_sidebar_data(
     db: Session = Depends(get_db)
 ):
     try:
-        guru = db.query(Guru).filter(Guru.id_pengguna == current_user.id).first()
+        guru = db.query(
+            Guru.nama_sekolah,
+            Guru.nama_lengkap,
+            Guru.nip,
+            Guru.tingkat_pendidikan,
+            Guru.jenis_kelamin
+        ).filter(Guru.id_pengguna == current_user.id).first()
         
         if not guru:
             raise HTTPException(
@@ -204,13 +218,7 @@ async def get_guru_sidebar_data(
                 detail="Data guru tidak ditemukan"
             )
             
-        return {
-            "nama_sekolah": guru.nama_sekolah,
-            "nama_lengkap": guru.nama_lengkap,
-            "nip": guru.nip,
-            "tingkat_pendidikan": guru.tingkat_pendidikan,
-            "jenis_kelamin": guru.jenis_kelamin
-        }
+        return ModelResponse(guru._asdict(), GuruSidebarResponse)
         
     except HTTPException as he:
         raise he
@@ -226,7 +234,13 @@ async def get_guru_navbar_data(
     db: Session = Depends(get_db)
 ):
     try:
-        guru = db.query(Guru).filter(Guru.id_pengguna == current_user.id).first()
+        guru = db.query(
+            Guru.nama_lengkap,
+            Guru.tingkat_pendidikan,
+            Guru.nama_sekolah,
+            Guru.jenis_kelamin,
+            Guru.nip
+        ).filter(Guru.id_pengguna == current_user.id).first()
         
         if not guru:
             raise HTTPException(
@@ -234,14 +248,7 @@ async def get_guru_navbar_data(
                 detail="Data guru tidak ditemukan"
             )
             
-        return {
-            "nama_lengkap": guru.nama_lengkap,
-            "tingkat_pendidikan": guru.tingkat_pendidikan,
-            "nama_sekolah": guru.nama_sekolah,
-            "email": current_user.email,
-            "jenis_kelamin": guru.jenis_kelamin,
-            "nip": guru.nip
-        }
+        return ModelResponse({**guru._asdict(), "email": current_user.email}, GuruNavbarResponse)
         
     except HTTPException as he:
         raise he
@@ -253,12 +260,13 @@ async def get_guru_navbar_data(
     
 @router.get("/siswa", response_model=List[SiswaKategoriResponse])
 async def get_siswa_by_kategori(
+    request: Request,
     kategori: Literal['pemrosesan', 'persepsi', 'input', 'pemahaman'],
     kelas: Optional[str] = None,
     search: Optional[str] = None,
     filter_kategori: Optional[str] = None,  
     filter_penjelasan: Optional[str] = None,  
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Pengguna = Depends(security.require_role(PeranEnum.guru))
 ):
     try:
@@ -279,6 +287,11 @@ async def get_siswa_by_kategori(
         if not current_guru:
             raise HTTPException(status_code=404, detail="Guru tidak ditemukan")
 
+        # Data siswa sekolah ini dan penjelasan katalog; filter ikut membedakan respons
+        etag = buat_etag(db, [kunci_sekolah(current_guru.nama_sekolah), KATALOG], current_user.id, request.url.query)
+        if etag_cocok(request, etag):
+            return respons_304(etag)
+
         kategori_column, rekomendasi_id = kategori_map[kategori]
 
         subquery = (
@@ -329,13 +342,13 @@ async def get_siswa_by_kategori(
 
         results = query.all()
 
-        return [{
+        # Dibangun dari baris DB sesuai SiswaKategoriResponse; tanpa validasi ulang
+        return FastJSONResponse([{
             "nama_lengkap": r.nama_lengkap,
             "kelas": r.kelas,
             "tes_terakhir": r.dibuat_pada,
-            "kategori": getattr(r, kategori_column),
-            "penjelasan": r.penjelasan
-        } for r in results]
+            "kategori": getattr(r, kategori_column)
+        } for r in results], headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
     except HTTPException as he:
         raise he
@@ -348,7 +361,7 @@ async def get_siswa_by_kategori(
 @router.get("/siswa-export-simple", response_model=List[SiswaExportSimpleResponse])
 async def export_data_siswa_simple(
     search: Optional[str] = None,  # Parameter pencarian
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Pengguna = Depends(security.require_role(PeranEnum.guru))
 ):
     try:
@@ -393,7 +406,7 @@ async def export_data_siswa_simple(
         
         results = query.all()
         
-        return [{
+        return FastJSONResponse([{
             "nama_lengkap": r.nama_lengkap,
             "kelas": r.kelas,  # Tambahkan kelas ke response
             "sekolah": r.sekolah,
@@ -401,7 +414,7 @@ async def export_data_siswa_simple(
             "kategori_persepsi": r.kategori_persepsi,
             "kategori_input": r.kategori_input,
             "kategori_pemahaman": r.kategori_pemahaman
-        } for r in results]
+        } for r in results])
         
     except HTTPException as he:
         raise he
@@ -412,8 +425,12 @@ async def export_data_siswa_simple(
         )
     
 @router.get("/dashboard", response_model=StatistikResponse)
+# Auth, guru, cek versi data, total siswa, jumlah kelas, sudah tes, kategori
+@query_budget(7)
 async def get_statistik(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user: Pengguna = Depends(security.require_role(PeranEnum.guru))
 ):
     try:
@@ -424,6 +441,11 @@ async def get_statistik(
             
         sekolah = current_guru.nama_sekolah
 
+        # 304 sebelum query statistik bila data sekolah belum berubah
+        etag = buat_etag(db, [kunci_sekolah(sekolah)], current_user.id)
+        if etag_cocok(request, etag):
+            return respons_304(etag)
+
         # 1. Total Siswa
         total_siswa = db.query(Siswa).filter(Siswa.nama_sekolah == sekolah).count()
 
@@ -448,23 +470,24 @@ async def get_statistik(
                           .filter(Siswa.nama_sekolah == sekolah)\
                           .scalar()
 
-        # 5. Query untuk semua kategori
-        kategori_counts = {k: {} for k in KATEGORI_MAPPING}
-        
-        for kategori, subkategori_list in KATEGORI_MAPPING.items():
-            for subkategori in subkategori_list:
-                count = db.query(func.count(func.distinct(Siswa.id_pengguna)))\
-                        .join(subquery, Siswa.id_pengguna == subquery.c.id_pengguna)\
-                        .join(HasilGayaBelajar, 
-                            (HasilGayaBelajar.id_pengguna == subquery.c.id_pengguna) &
-                            (HasilGayaBelajar.dibuat_pada == subquery.c.terakhir_tes))\
-                        .filter(
-                            Siswa.nama_sekolah == sekolah,
-                            getattr(HasilGayaBelajar, f"kategori_{kategori}") == subkategori
-                        )\
-                        .scalar()
-                kategori_counts[kategori][subkategori] = count
+        # 5. Semua kategori dalam satu GROUP BY atas hasil terakhir tiap siswa
+        kolom_kategori = [getattr(HasilGayaBelajar, f"kategori_{k}") for k in KATEGORI_MAPPING]
+        kombinasi = db.query(*kolom_kategori, func.count(func.distinct(Siswa.id_pengguna)))\
+                    .join(subquery, Siswa.id_pengguna == subquery.c.id_pengguna)\
+                    .join(HasilGayaBelajar,
+                        (HasilGayaBelajar.id_pengguna == subquery.c.id_pengguna) &
+                        (HasilGayaBelajar.dibuat_pada == subquery.c.terakhir_tes))\
+                    .filter(Siswa.nama_sekolah == sekolah)\
+                    .group_by(*kolom_kategori)\
+                    .all()
+
+        kategori_counts = {k: dict.fromkeys(subkategori_list, 0) for k, subkategori_list in KATEGORI_MAPPING.items()}
+        for *nilai, count in kombinasi:
+            for kategori, subkategori in zip(KATEGORI_MAPPING, nilai):
+                if subkategori in kategori_counts[kategori]:
+                    kategori_counts[kategori][subkategori] += count
 
+        pasang_etag(response, etag)
         return {
             "total_siswa": total_siswa,
             "jumlah_kelas": jumlah_kelas,
@@ -1,13 +1,17 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from app import security
+from app.counters import admin_counters
 from app.database import get_db
+from app.fast_response import ModelResponse
 from app.security import get_current_user
+from app.tracing import TracedRoute
 from app.models import Pengguna, PeranEnum, Siswa
+from app.versi_data import buat_etag, etag_cocok, kunci_pengguna, kunci_sekolah, naikkan_versi, pasang_etag, respons_304
 from app.schemas.siswa import SiswaNavbarResponse, SiswaProfilResponse, SiswaRegister, SiswaSidebarResponse, SiswaUpdateProfile
 
-router = APIRouter(prefix="/siswa",tags=["Siswa"]
+router = APIRouter(prefix="/siswa",tags=["Siswa"], route_class=TracedRoute
 )
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
@@ -58,7 +62,9 @@ async def register_siswa(
         )
 
         db.add(new_siswa)
+        naikkan_versi(db, kunci_sekolah(siswa_data.nama_sekolah))
         db.commit()
+        admin_counters.incr(PeranEnum.siswa.value)
         
         return {"message": "Registrasi siswa berhasil"}
     except ValueError as ve:
@@ -76,11 +82,25 @@ async def register_siswa(
 
 @router.get("/profil", response_model=SiswaProfilResponse)
 async def get_profil_siswa(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Pengguna = Depends(security.require_role(PeranEnum.siswa))
 ):
     try:
-        siswa = db.query(Siswa).filter(Siswa.id_pengguna == current_user.id).first()
+        etag = buat_etag(db, [kunci_pengguna(current_user.id)])
+        if etag_cocok(request, etag):
+            return respons_304(etag)
+
+        siswa = db.query(
+            Siswa.nisn,
+            Siswa.nama_lengkap,
+            Siswa.nomor_telepon,
+            Siswa.tanggal_lahir,
+            Siswa.jenis_kelamin,
+            Siswa.kelas,
+            Siswa.nama_sekolah,
+            Siswa.penyandang_disabilitas
+        ).filter(Siswa.id_pengguna == current_user.id).first()
         
         if not siswa:
             raise HTTPException(
@@ -88,17 +108,13 @@ async def get_profil_siswa(
                 detail="Profil siswa tidak ditemukan"
             )
             
-        return {
+        response = ModelResponse({
+            **siswa._asdict(),
             "email": current_user.email,
-            "nisn": siswa.nisn,
-            "nama_lengkap": siswa.nama_lengkap,
-            "nomor_telepon": siswa.nomor_telepon,
-            "tanggal_lahir": siswa.tanggal_lahir.strftime("%d-%m-%Y"),
-            "jenis_kelamin": siswa.jenis_kelamin,
-            "kelas": siswa.kelas,
-            "nama_sekolah": siswa.nama_sekolah,
-            "penyandang_disabilitas": siswa.penyandang_disabilitas
-        }
+            "tanggal_lahir": siswa.tanggal_lahir.strftime("%d-%m-%Y")
+        }, SiswaProfilResponse)
+        pasang_etag(response, etag)
+        return response
         
     except Exception as e:
         raise HTTPException(
@@ -123,6 +139,9 @@ async def update_profil_siswa(
         # Convert tanggal lahir ke Date object
         tanggal_lahir = datetime.strptime(update_data.tanggal_lahir, "%d-%m-%Y").date()
         
+        # Sekolah lama dan baru sama-sama berubah daftar siswanya
+        naikkan_versi(db, kunci_pengguna(current_user.id), kunci_sekolah(siswa.nama_sekolah), kunci_sekolah(update_data.nama_sekolah))
+
         # Update data
         siswa.nama_lengkap = update_data.nama_lengkap
         siswa.nomor_telepon = update_data.nomor_telepon
@@ -166,20 +185,20 @@ async def get_sidebar_data(
     db: Session = Depends(get_db)
 ):
     try:
-        siswa = db.query(Siswa).filter(Siswa.id_pengguna == current_user.id).first()
+        siswa = db.query(
+            Siswa.nama_sekolah,
+            Siswa.nama_lengkap,
+            Siswa.nisn,
+            Siswa.kelas,
+            Siswa.jenis_kelamin
+        ).filter(Siswa.id_pengguna == current_user.id).first()
         if not siswa:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Data siswa tidak ditemukan"
             )
             
-        return {
-            "nama_sekolah": siswa.nama_sekolah,
-            "nama_lengkap": siswa.nama_lengkap,
-            "nisn": siswa.nisn,
-            "kelas": siswa.kelas,
-            "jenis_kelamin": siswa.jenis_kelamin 
-        }
+        return ModelResponse(siswa._asdict(), SiswaSidebarResponse)
         
     except HTTPException as he:
         raise he
@@ -195,20 +214,19 @@ async def get_navbar_data(
     db: Session = Depends(get_db)
 ):
     try:
-        siswa = db.query(Siswa).filter(Siswa.id_pengguna == current_user.id).first()
+        siswa = db.query(
+            Siswa.nama_lengkap,
+            Siswa.kelas,
+            Siswa.nama_sekolah,
+            Siswa.jenis_kelamin
+        ).filter(Siswa.id_pengguna == current_user.id).first()
         if not siswa:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Data siswa tidak ditemukan"
             )
             
-        return {
-            "nama_lengkap": siswa.nama_lengkap,
-            "kelas": siswa.kelas,
-            "nama_sekolah": siswa.nama_sekolah,
-            "email": current_user.email, 
-            "jenis_kelamin": siswa.jenis_kelamin 
-        }
+        return ModelResponse({**siswa._asdict(), "email": current_user.email}, SiswaNavbarResponse)
         
     except HTTPException as he:
         raise he
@@ -1,15 +1,25 @@
 from datetime import datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session, joinedload
+from app.counters import TES_SELESAI, admin_counters
 from app.database import get_db
+from app.fast_response import FastJSONResponse
+from app.katalog_rekomendasi import katalog_rekomendasi
+from app.query_budget import query_budget
+from app.replica import get_read_db, tandai_tulis
 from app.security import get_current_user
 from app.models import HasilGayaBelajar, JawabanPengguna, Pengguna, RekomendasiGayaBelajar, Soal
+from app.outbox import HASIL_TES_DIBUAT, outbox_runner, tambah_job
+from app.tracing import TracedRoute
+from app.versi_data import KATALOG, buat_etag, etag_cocok, kunci_pengguna, naikkan_versi, pasang_etag, respons_304
+from app.versi_soal import get_nomor_versi, set_soal
 from app.schemas.soal import DashboardSiswaResponse, DetailHasilTesResponse, HasilGayaBelajarResponse, JawabanSubmit, RekapTesResponse, RekomendasiGayaBelajarResponse, SoalResponse
 
 router = APIRouter(
     prefix="/soal",
-    tags=["Soal"]
+    tags=["Soal"],
+    route_class=TracedRoute
 )
 
 # Helper functions untuk kategorisasi dengan skor asli (positif/negatif)
@@ -61,6 +71,13 @@ def kategorisasi_pemahaman(skor: int) -> str:
         elif 9 <= skor <= 11: return "Sequential Kuat"
     return "Tidak Diketahui"
 
+def hitung_skor_dimensi(jawaban_dict: dict, start: int, end: int) -> int:
+    """Skor mentah satu dimensi: +1 untuk setiap A, -1 untuk setiap B."""
+    return sum(
+        1 if jawaban_dict.get(soal_id) == 'A' else -1
+        for soal_id in range(start, end + 1)
+    )
+
 @router.get("/", 
             response_model=List[SoalResponse],
             status_code=status.HTTP_200_OK)
@@ -69,7 +86,7 @@ async def get_all_soal(
     current_user: Pengguna = Depends(get_current_user)
 ):
     try:
-        return db.query(Soal).order_by(Soal.id).all()
+        return set_soal.get(db)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -81,6 +98,7 @@ async def get_all_soal(
              status_code=status.HTTP_201_CREATED)
 async def submit_jawaban(
     jawaban: List[JawabanSubmit],
+    response: Response,
     db: Session = Depends(get_db),
     current_user: Pengguna = Depends(get_current_user)
 ):
@@ -99,18 +117,11 @@ async def submit_jawaban(
         if len(set(soal_ids)) != 44 or min(soal_ids) < 1 or max(soal_ids) > 44:
             raise HTTPException(status_code=400, detail="ID soal tidak valid")
 
-        # Fungsi hitung skor yang diperbaiki
-        def hitung_skor_dimensi(start: int, end: int) -> int:
-            return sum(
-                1 if jawaban_dict.get(soal_id) == 'A' else -1
-                for soal_id in range(start, end + 1)
-            )  # Penambahan tanda kurung penutup yang benar
-
         # Hitung skor mentah
-        skor_pemrosesan = hitung_skor_dimensi(1, 11)
-        skor_persepsi = hitung_skor_dimensi(12, 22)
-        skor_input = hitung_skor_dimensi(23, 33)
-        skor_pemahaman = hitung_skor_dimensi(34, 44)
+        skor_pemrosesan = hitung_skor_dimensi(jawaban_dict, 1, 11)
+        skor_persepsi = hitung_skor_dimensi(jawaban_dict, 12, 22)
+        skor_input = hitung_skor_dimensi(jawaban_dict, 23, 33)
+        skor_pemahaman = hitung_skor_dimensi(jawaban_dict, 34, 44)
 
         # Kategorisasi
         kategori_pemrosesan = kategorisasi_pemrosesan(skor_pemrosesan)
@@ -118,24 +129,15 @@ async def submit_jawaban(
         kategori_input = kategorisasi_input(skor_input)
         kategori_pemahaman = kategorisasi_pemahaman(skor_pemahaman)
 
-        # Fungsi helper untuk mendapatkan ID rekomendasi
+        # Fungsi helper untuk mendapatkan ID rekomendasi (dari katalog di memori)
         def get_rekomendasi_id(dimensi: str, kategori: str) -> int:
-            rekomendasi = db.query(RekomendasiGayaBelajar).filter(
-                RekomendasiGayaBelajar.kategori == dimensi,
-                RekomendasiGayaBelajar.gaya_belajar == kategori
-            ).first()
-            
+            # Fallback ke rekomendasi default bila kategori spesifik tidak ada
+            rekomendasi = katalog_rekomendasi.get(db, dimensi, kategori)
             if not rekomendasi:
-                # Fallback ke rekomendasi default
-                rekomendasi = db.query(RekomendasiGayaBelajar).filter(
-                    RekomendasiGayaBelajar.kategori == dimensi,
-                    RekomendasiGayaBelajar.gaya_belajar == "Default"
-                ).first()
-                if not rekomendasi:
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Rekomendasi default untuk dimensi {dimensi} tidak ditemukan"
-                    )
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Rekomendasi default untuk dimensi {dimensi} tidak ditemukan"
+                )
             return rekomendasi.id
 
         # Dapatkan ID rekomendasi untuk setiap kategori
@@ -154,6 +156,7 @@ async def submit_jawaban(
         jawaban_record = JawabanPengguna(
             id_pengguna=current_user.id,
             jawaban=[{"id_soal": j.id_soal, "pilihan": j.pilihan.upper()} for j in jawaban],
+            versi_soal=get_nomor_versi(db),
             dijawab_pada=datetime.utcnow()
         )
         db.add(jawaban_record)
@@ -175,7 +178,17 @@ async def submit_jawaban(
             id_rekomendasi_pemahaman=id_rekom_pemahaman
         )
         db.add(hasil)
+        db.flush()
+        # Dashboard siswa ini langsung berubah; pekerjaan lanjutan (mis. versi
+        # dashboard guru di sekolahnya) diproses outbox di luar request, atau
+        # langsung di transaksi ini bila runner outbox dimatikan
+        naikkan_versi(db, kunci_pengguna(current_user.id))
+        tambah_job(db, HASIL_TES_DIBUAT, {"id_pengguna": current_user.id, "id_hasil": hasil.id})
         db.commit()
+        outbox_runner.notify()
+        admin_counters.incr(TES_SELESAI)
+        # Hasil tes dibaca dari primary sampai replica menyusul, di worker mana pun
+        tandai_tulis(response, current_user.id)
         db.refresh(hasil)
         
         return hasil
@@ -193,7 +206,7 @@ async def submit_jawaban(
 @router.get("/rekomendasi",
             response_model=List[RekomendasiGayaBelajarResponse])
 async def get_rekomendasi_gaya_belajar(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Pengguna = Depends(get_current_user)
 ):
     try:
@@ -240,8 +253,9 @@ async def get_rekomendasi_gaya_belajar(
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan server: {str(e)}")
 
 @router.get("/rekap-tes", response_model=RekapTesResponse)
+@query_budget(3)
 async def get_rekap_tes(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Pengguna = Depends(get_current_user)
 ):
     try:
@@ -265,10 +279,8 @@ async def get_rekap_tes(
             rekomendasi_list = [] 
             
             for dimensi, kategori in dimensi_kategori:
-                rekomendasi = db.query(RekomendasiGayaBelajar).filter(
-                    RekomendasiGayaBelajar.kategori == dimensi,
-                    RekomendasiGayaBelajar.gaya_belajar == kategori
-                ).first()
+                # Dari katalog di memori, bukan satu query per dimensi per tes
+                rekomendasi = katalog_rekomendasi.get(db, dimensi, kategori, fallback_default=False)
                 
                 if rekomendasi:
                     penjelasan[dimensi] = rekomendasi.penjelasan
@@ -292,11 +304,11 @@ async def get_rekap_tes(
                 "rekomendasi": " | ".join(rekomendasi_list)  # Rekomendasi tetap digabung
             })
         
-        return {
+        return FastJSONResponse({
             "total_tes": len(hasil_tes),
             "tanggal_tes_terakhir": hasil_tes[0].dibuat_pada,
             "daftar_tes": formatted_tes
-        }
+        })
     except Exception as e:
         raise HTTPException(500, detail=f"Server error: {str(e)}")
     
@@ -310,11 +322,20 @@ async def get_rekap_tes(
                 401: {"description": "Unauthorized"},
                 500: {"description": "Internal server error"}
             })
+# Auth, cek versi data, hasil terakhir, total tes (+1 bila katalog belum dimuat)
+@query_budget(5)
 async def get_dashboard_siswa(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user: Pengguna = Depends(get_current_user)
 ):
     try:
+        # 304 bila hasil tes dan katalog belum berubah sejak respons terakhir
+        etag = buat_etag(db, [kunci_pengguna(current_user.id), KATALOG])
+        if etag_cocok(request, etag):
+            return respons_304(etag)
+
         # Ambil hasil tes terakhir
         hasil_terakhir = db.query(HasilGayaBelajar).filter(
             HasilGayaBelajar.id_pengguna == current_user.id
@@ -362,18 +383,8 @@ async def get_dashboard_siswa(
         ]
         
         for dimensi, kategori in dimensi_kategori:
-            # Coba cari rekomendasi spesifik
-            rec = db.query(RekomendasiGayaBelajar).filter(
-                RekomendasiGayaBelajar.kategori == dimensi,
-                RekomendasiGayaBelajar.gaya_belajar == kategori
-            ).first()
-            
-            # Jika tidak ditemukan, gunakan rekomendasi default
-            if not rec:
-                rec = db.query(RekomendasiGayaBelajar).filter(
-                    RekomendasiGayaBelajar.kategori == dimensi,
-                    RekomendasiGayaBelajar.gaya_belajar == "Default"
-                ).first()
+            # Rekomendasi spesifik, atau rekomendasi default bila tidak ada
+            rec = katalog_rekomendasi.get(db, dimensi, kategori)
                 
             rekomendasi.append({
                 "dimensi": dimensi,
@@ -382,6 +393,7 @@ async def get_dashboard_siswa(
                 "rekomendasi": rec.rekomendasi if rec else "Rekomendasi belum tersedia"
             })
             
+        pasang_etag(response, etag)
         return {
             "total_tes": total_tes,
             "terakhir_tes": hasil_terakhir.dibuat_pada,
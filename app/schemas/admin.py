@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, EmailStr, Field, validator
 import re
 
@@ -71,6 +71,7 @@ class SiswaResponse(BaseModel):
 class SiswaListResponse(BaseModel):
     data: List[SiswaResponse]
     total: int
+    next_cursor: Optional[int] = None
 
 class GuruResponse(BaseModel):
     id: int
@@ -85,6 +86,7 @@ class GuruResponse(BaseModel):
 class GuruListResponse(BaseModel):
     data: List[GuruResponse]
     total: int
+    next_cursor: Optional[int] = None
 
 class AdminListResponse(BaseModel):
     id: int
@@ -99,6 +101,7 @@ class AdminListResponse(BaseModel):
 class AdminListPaginatedResponse(BaseModel):
     data: List[AdminListResponse]
     total: int
+    next_cursor: Optional[int] = None
 
 class SoalResponse(BaseModel):
     id: int
@@ -120,6 +123,30 @@ class SoalUpdateRequest(BaseModel):
     pilihan_a: Optional[str] = None
     pilihan_b: Optional[str] = None
 
+class SoalBulkItem(BaseModel):
+    id: Optional[int] = Field(None, ge=1, le=44)
+    pertanyaan: str = Field(..., min_length=1)
+    pilihan_a: str = Field(..., min_length=1)
+    pilihan_b: str = Field(..., min_length=1)
+
+class SoalBulkRequest(BaseModel):
+    mode: Literal["replace", "upsert"] = "upsert"
+    soal: List[SoalBulkItem] = Field(..., min_length=1, max_length=44)
+
+    @validator('soal')
+    def validate_unique_id(cls, v):
+        ids = [item.id for item in v if item.id is not None]
+        if len(ids) != len(set(ids)):
+            raise ValueError("ID soal tidak boleh duplikat")
+        return v
+
+class SoalBulkResponse(BaseModel):
+    versi: int
+    jumlah_soal: int
+    ditambahkan: int
+    diperbarui: int
+    dihapus: int
+
 class RekomendasiResponse(BaseModel):
     id: int
     kategori: str
@@ -143,10 +170,66 @@ class RekomendasiUpdateRequest(BaseModel):
     penjelasan: Optional[str] = None
     rekomendasi: Optional[str] = None
 
+class RekomendasiBulkResponse(BaseModel):
+    diproses: int
+    ditambahkan: int
+    diperbarui: int
+    duplikat: int
+
+class JawabanItem(BaseModel):
+    id_soal: int
+    pilihan: str
+
+class JawabanDetailResponse(BaseModel):
+    id: int
+    id_pengguna: int
+    jawaban: List[JawabanItem]
+    versi_soal: Optional[int] = None
+    dijawab_pada: Optional[datetime] = None
+    diarsipkan: bool
+
 # Schema untuk error response
 class ErrorResponse(BaseModel):
     detail: str
 
 
 class DeleteUserResponse(BaseModel):
-    detail: str
\ No newline at end of file
+    detail: str
+
+class BulkDeleteRequest(BaseModel):
+    peran: Literal["siswa", "guru", "admin"]
+    ids: List[int] = Field(..., min_length=1, max_length=50000)
+
+class BulkDeleteResponse(BaseModel):
+    dihapus: int
+    tidak_ditemukan: List[int]
+    dilewati: List[int]
+
+class SekolahImportRejectedRow(BaseModel):
+    baris: int
+    nama_sekolah: str
+    alasan: str
+
+class SekolahImportResponse(BaseModel):
+    total_baris: int
+    ditambahkan: int
+    duplikat: int
+    ditolak: int
+    contoh_ditolak: List[SekolahImportRejectedRow]
+    durasi_detik: float
+    baris_per_detik: float
+
+class AkunImportRow(BaseModel):
+    baris: int
+    email: Optional[str] = None
+    status: str
+    alasan: Optional[str] = None
+
+class AkunImportResponse(BaseModel):
+    peran: str
+    total_baris: int
+    ditambahkan: int
+    ditolak: int
+    gagal: int
+    durasi_detik: float
+    baris: List[AkunImportRow]
@@ -9,6 +9,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import Pengguna, PeranEnum
+from app.tracing import trace_span
 
 # Config
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-here")
@@ -30,10 +31,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    with trace_span("bcrypt.verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    with trace_span("bcrypt.hash"):
+        return pwd_context.hash(password)
 
 async def get_token(
     request: Request,
@@ -61,7 +64,8 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with trace_span("jwt.decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("sub")
         if user_id is None:
             raise credentials_exception
@@ -0,0 +1,145 @@
+# File: sekolah_import.py
+"""
+Impor massal daftar sekolah dari CSV.
+
+Nama dinormalisasi dan dideduplikasi di memori (tanpa membedakan huruf
+besar/kecil, sama seperti POST /auth/sekolah), lalu ditulis dengan
+INSERT multi-baris per batch yang melewati baris yang sudah ada.
+
+Pemakaian CLI:
+    python -m app.sekolah_import daftar_sekolah.csv --batch-size 5000
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.cache import cache_coherence
+from app.database import SessionLocal, insert_ignore
+from app.models import Sekolah
+from app.sekolah_index import normalize_key, sekolah_index
+from app.versi_data import INDEKS_SEKOLAH, naikkan_versi
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REJECTED_SAMPLE = 100
+NAMA_MIN_LENGTH = 3
+NAMA_MAX_LENGTH = 255
+
+
+def read_nama_sekolah(file: TextIO, column: str = "nama_sekolah") -> Iterator[Tuple[int, str]]:
+    """
+    Hasilkan (nomor baris, nama) dari CSV. Tanpa header, baris pertama
+    dianggap data hanya bila file terdiri dari satu kolom; CSV multi-kolom
+    tanpa kolom nama_sekolah ditolak dengan ValueError.
+    """
+    reader = csv.reader(file)
+    first = next(reader, None)
+    if first is None:
+        return
+    header = [h.strip().lower() for h in first]
+    if column in header:
+        idx = header.index(column)
+    elif len(first) <= 1:
+        idx = 0
+        yield 1, first[0] if first else ""
+    else:
+        raise ValueError(f"Kolom {column} tidak ditemukan di header CSV")
+    for row in reader:
+        yield reader.line_num, row[idx] if len(row) > idx else ""
+
+
+def import_sekolah(
+    db: Session,
+    rows: Iterable[Tuple[int, str]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict:
+    started = time.perf_counter()
+
+    # Nama yang sudah ada di DB ikut dideduplikasi tanpa membedakan huruf
+    seen = {normalize_key(nama) for (nama,) in db.query(Sekolah.nama_sekolah)}
+
+    total_rows = inserted = skipped = duplicate = 0
+    rejected = []
+    rejected_count = 0
+    batch: List[dict] = []
+
+    def reject(line: int, nama: str, alasan: str):
+        nonlocal rejected_count
+        rejected_count += 1
+        if len(rejected) < MAX_REJECTED_SAMPLE:
+            rejected.append({"baris": line, "nama_sekolah": nama, "alasan": alasan})
+
+    def flush():
+        nonlocal inserted, skipped
+        if not batch:
+            return
+        result = db.execute(insert_ignore(db, Sekolah).values(batch))
+        naikkan_versi(db, INDEKS_SEKOLAH)
+        db.commit()
+        count = result.rowcount if result.rowcount >= 0 else len(batch)
+        inserted += count
+        skipped += len(batch) - count
+        batch.clear()
+
+    try:
+        for line, raw in rows:
+            total_rows += 1
+            nama = " ".join((raw or "").split())
+            if len(nama) < NAMA_MIN_LENGTH:
+                reject(line, raw, "Nama sekolah minimal 3 karakter")
+                continue
+            if len(nama) > NAMA_MAX_LENGTH:
+                reject(line, raw, "Nama sekolah maksimal 255 karakter")
+                continue
+            key = normalize_key(nama)
+            if key in seen:
+                duplicate += 1
+                continue
+            seen.add(key)
+            batch.append({"nama_sekolah": nama})
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    except Exception:
+        db.rollback()
+        raise
+
+    if inserted:
+        sekolah_index.load_from_db(db)
+        cache_coherence.publish(INDEKS_SEKOLAH)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "total_baris": total_rows,
+        "ditambahkan": inserted,
+        "duplikat": duplicate + skipped,
+        "ditolak": rejected_count,
+        "contoh_ditolak": rejected,
+        "durasi_detik": round(elapsed, 3),
+        "baris_per_detik": round(total_rows / elapsed, 1) if elapsed > 0 else float(total_rows),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Impor massal daftar sekolah dari CSV")
+    parser.add_argument("csv_path", help="Path file CSV (kolom nama_sekolah, atau satu kolom tanpa header)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--column", default="nama_sekolah", help="Nama kolom header")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        with open(args.csv_path, newline="", encoding="utf-8-sig") as f:
+            report = import_sekolah(db, read_nama_sekolah(f, args.column), args.batch_size)
+    finally:
+        db.close()
+    json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
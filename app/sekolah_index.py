@@ -0,0 +1,121 @@
+# File: sekolah_index.py
+"""
+Indeks nama sekolah di memori untuk autocomplete /auth/sekolah.
+
+- Prefix dicari dengan bisect pada daftar nama terurut (casefold).
+- Substring pada awal kata (mis. "negeri" di "SMA Negeri 1") dicari
+  dengan bisect pada daftar sufiks per awal kata.
+- Substring di tengah kata hanya dipindai linear bila hasil belum
+  mencapai limit, sehingga hasil tetap sama dengan ILIKE '%nama%'.
+
+Worker lain yang menambah sekolah menyiarkan INDEKS_SEKOLAH lewat
+cache_coherence; indeks ditandai belum dimuat dan dimuat ulang dari DB
+pada pencarian berikutnya.
+"""
+from bisect import bisect_left, insort
+import heapq
+from threading import RLock
+from typing import Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.cache import cache_coherence
+from app.models import Sekolah
+from app.versi_data import INDEKS_SEKOLAH
+
+
+def normalize_key(nama: str) -> str:
+    return " ".join(nama.split()).casefold()
+
+
+def _word_starts(key: str) -> List[int]:
+    return [i for i in range(1, len(key)) if key[i - 1] == " " and key[i] != " "]
+
+
+class SekolahIndex:
+    def __init__(self):
+        self._lock = RLock()
+        # (keys, names, suffixes) diganti utuh setiap perubahan:
+        # keys = nama ter-normalisasi terurut, names = nama asli sejajar,
+        # suffixes = (sufiks dari awal kata, key) terurut
+        self._data: tuple = ([], [], [])
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._data[0])
+
+    def load(self, names: Iterable[str]):
+        pairs = sorted({normalize_key(n): n for n in names if n}.items())
+        suffixes = sorted(
+            (key[i:], key) for key, _ in pairs for i in _word_starts(key)
+        )
+        with self._lock:
+            self._data = ([k for k, _ in pairs], [n for _, n in pairs], suffixes)
+            self.loaded = True
+
+    def load_from_db(self, db: Session):
+        self.load(nama for (nama,) in db.query(Sekolah.nama_sekolah))
+
+    def invalidate(self):
+        # Data lama tetap dipakai pembaca sampai dimuat ulang
+        self.loaded = False
+
+    def add(self, nama: str):
+        key = normalize_key(nama)
+        with self._lock:
+            keys, names, suffixes = self._data
+            pos = bisect_left(keys, key)
+            if pos < len(keys) and keys[pos] == key:
+                return
+            # Copy-on-write agar pembaca yang sedang mencari tidak terganggu
+            keys, names, suffixes = list(keys), list(names), list(suffixes)
+            keys.insert(pos, key)
+            names.insert(pos, nama)
+            for i in _word_starts(key):
+                insort(suffixes, (key[i:], key))
+            self._data = (keys, names, suffixes)
+
+    def search(self, nama: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        """Prefix diurutkan lebih dulu, lalu substring; masing-masing alfabetis."""
+        query = normalize_key(nama or "")
+        keys, names, suffixes = self._data
+
+        if not query:
+            return names[:limit] if limit else list(names)
+
+        # 1. Prefix nama
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        hasil = names[start:end]
+        if limit and len(hasil) >= limit:
+            return hasil[:limit]
+
+        # 2. Prefix kata di tengah nama
+        sisa = limit - len(hasil) if limit else None
+        matched = set()
+        pos = bisect_left(suffixes, (query,))
+        while pos < len(suffixes) and suffixes[pos][0].startswith(query):
+            key = suffixes[pos][1]
+            if not key.startswith(query):
+                matched.add(key)
+            pos += 1
+        word_keys = heapq.nsmallest(sisa, matched) if sisa else sorted(matched)
+
+        # 3. Substring di tengah kata (jarang, hanya bila masih kurang)
+        if not sisa or len(word_keys) < sisa:
+            seen = matched.union(keys[start:end])
+            word_keys = sorted(
+                word_keys + [k for k in keys if query in k and k not in seen]
+            )
+            if sisa:
+                word_keys = word_keys[:sisa]
+
+        for key in word_keys:
+            hasil.append(names[bisect_left(keys, key)])
+        return hasil
+
+
+sekolah_index = SekolahIndex()
+cache_coherence.register(INDEKS_SEKOLAH, sekolah_index.invalidate)
@@ -0,0 +1,163 @@
+# File: server.py
+"""
+Entry point server produksi.
+
+Menjalankan uvicorn dengan beberapa worker proses yang berbagi satu socket.
+Jumlah worker:
+- WEB_CONCURRENCY bila diset (Heroku mengisinya sesuai ukuran dyno);
+- selain itu min(CPU x WORKERS_PER_CORE, memori / WORKER_MEMORY_MB),
+  dibatasi MAX_WORKERS.
+
+Metrik /metrics dijumlahkan antar worker lewat METRICS_DIR (lihat
+app.metrics); bila tidak diset, direktori sementara dibuat di sini dan
+snapshot lama di dalamnya dibersihkan saat start.
+
+Setiap worker memanaskan cache (soal, katalog rekomendasi, sekolah) di
+lifespan app.main sebelum menerima request.
+
+Sinyal pada proses induk:
+- SIGTERM/SIGINT: drain; worker berhenti menerima koneksi baru dan diberi
+  GRACEFUL_TIMEOUT detik untuk menyelesaikan request yang berjalan.
+- SIGHUP: rolling restart; worker baru dijalankan dan diberi waktu
+  ROLLING_RESTART_WARMUP_SECONDS sebelum worker lama di-drain, satu per satu.
+- SIGTTIN/SIGTTOU: tambah/kurangi satu worker.
+
+Pemakaian:
+    python -m app.server
+"""
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+import uvicorn
+from uvicorn.supervisors.multiprocess import SIGNALS, Multiprocess, Process
+
+logger = logging.getLogger("uvicorn.error")
+
+WORKERS_PER_CORE = float(os.getenv("WORKERS_PER_CORE", "1"))
+WORKER_MEMORY_MB = int(os.getenv("WORKER_MEMORY_MB", "256"))
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "8"))
+# Heroku mengirim SIGKILL 30 detik setelah SIGTERM
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "25"))
+ROLLING_RESTART_WARMUP_SECONDS = float(os.getenv("ROLLING_RESTART_WARMUP_SECONDS", "10"))
+
+
+def _jumlah_cpu() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _memori_mb() -> Optional[int]:
+    """Batas memori cgroup (container), atau memori fisik host."""
+    limits = []
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit():
+            limits.append(int(value))
+    try:
+        limits.append(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"))
+    except (ValueError, OSError, AttributeError):
+        pass
+    return min(limits) // (1024 * 1024) if limits else None
+
+
+def hitung_jumlah_worker(cpu: Optional[int] = None, memori_mb: Optional[int] = None) -> int:
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.getenv("WEB_CONCURRENCY")))
+    cpu = cpu or _jumlah_cpu()
+    memori_mb = memori_mb if memori_mb is not None else _memori_mb()
+    workers = int(cpu * WORKERS_PER_CORE)
+    if memori_mb:
+        workers = min(workers, memori_mb // WORKER_MEMORY_MB)
+    return max(1, min(workers, MAX_WORKERS))
+
+
+def siapkan_metrics_dir() -> str:
+    """Diwarisi worker lewat environment; counter dimulai dari nol setiap start penuh."""
+    directory = os.getenv("METRICS_DIR") or tempfile.mkdtemp(prefix="metrics-")
+    os.makedirs(directory, exist_ok=True)
+    for nama in os.listdir(directory):
+        if nama.endswith((".json", ".tmp")):
+            os.remove(os.path.join(directory, nama))
+    os.environ["METRICS_DIR"] = directory
+    return directory
+
+
+class RollingMultiprocess(Multiprocess):
+    """Supervisor uvicorn dengan restart bergilir tanpa mengosongkan kapasitas."""
+
+    def _tunggu_warmup(self, new: Process) -> bool:
+        """
+        Tunggu warmup worker baru tanpa memblokir supervisor: sinyal berhenti
+        dan worker lain yang mati tetap ditangani. SIGHUP/SIGTTIN/SIGTTOU
+        ditunda sampai rolling restart selesai. False bila harus berhenti.
+        """
+        deadline = time.monotonic() + ROLLING_RESTART_WARMUP_SECONDS
+        while new.is_alive():
+            sisa = deadline - time.monotonic()
+            if sisa <= 0 or self.should_exit.wait(min(sisa, 0.5)):
+                break
+            for sig in tuple(self.signal_queue):
+                if SIGNALS[sig] in ("INT", "TERM", "BREAK"):
+                    self.signal_queue.remove(sig)
+                    getattr(self, f"handle_{SIGNALS[sig].lower()}")()
+            self.keep_subprocess_alive()
+        return not self.should_exit.is_set()
+
+    def restart_all(self) -> None:
+        for idx, old in enumerate(list(self.processes)):
+            new = Process(self.config, self.target, self.sockets)
+            new.start()
+            # Worker baru baru memanggil accept() setelah lifespan (warmup) selesai
+            if not self._tunggu_warmup(new):
+                # Belum masuk self.processes, jadi tidak ikut dihentikan terminate_all()
+                new.terminate()
+                new.join()
+                return
+            if not new.is_alive():
+                logger.error("Worker baru gagal start, rolling restart dihentikan")
+                new.kill()
+                return
+            self.processes[idx] = new
+            old.terminate()
+            old.join()
+
+
+def main():
+    workers = hitung_jumlah_worker()
+    config = uvicorn.Config(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "*"),
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+    )
+    logger.info("Menjalankan %d worker (cpu=%s, memori=%s MB)", workers, _jumlah_cpu(), _memori_mb())
+    server = uvicorn.Server(config)
+    if workers == 1:
+        server.run()
+        return
+    metrics_sementara = not os.getenv("METRICS_DIR")
+    metrics_dir = siapkan_metrics_dir()
+    sock = config.bind_socket()
+    try:
+        RollingMultiprocess(config, target=server.run, sockets=[sock]).run()
+    finally:
+        sock.close()
+        if metrics_sementara:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
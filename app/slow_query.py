@@ -0,0 +1,189 @@
+# File: slow_query.py
+"""
+Log query lambat dengan EXPLAIN otomatis.
+
+Hook before/after_cursor_execute mengukur setiap statement. Statement di
+atas SLOW_QUERY_MS dicatat ke log (route, bentuk parameter tanpa nilainya,
+durasi) dan ke daftar SLOW_QUERY_TOP_N statement terlambat per route.
+
+Saat statement SELECT baru masuk daftar terlambat suatu route, EXPLAIN-nya
+diambil sekali oleh thread latar lewat koneksi terpisah (tidak menambah
+latensi request) dan disimpan di ring berukuran SLOW_QUERY_RING_SIZE.
+Semuanya dapat dilihat admin di GET /admin/slow-queries.
+SLOW_QUERY_MS=0 mematikan fitur ini.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+from app.metrics import current_route
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_TOP_N = int(os.getenv("SLOW_QUERY_TOP_N", "5"))
+SLOW_QUERY_RING_SIZE = int(os.getenv("SLOW_QUERY_RING_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+
+MAX_STATEMENT_CHARS = 2000
+
+_EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN "}
+
+
+def _nama_tipe(values) -> str:
+    # Dipadatkan per tipe berurutan agar daftar IN panjang tetap ringkas: int×1000
+    bagian = []
+    for value in values:
+        nama = type(value).__name__
+        if bagian and bagian[-1][0] == nama:
+            bagian[-1][1] += 1
+        else:
+            bagian.append([nama, 1])
+    return ", ".join(nama if n == 1 else f"{nama}×{n}" for nama, n in bagian)
+
+
+def bentuk_parameter(parameters, executemany: bool = False) -> str:
+    """Bentuk parameter (nama/tipe) tanpa nilainya, aman untuk log."""
+    if executemany:
+        if not parameters:
+            return "[]"
+        return f"{len(parameters)}× {bentuk_parameter(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return f"({_nama_tipe(parameters)})"
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        top_n: int = SLOW_QUERY_TOP_N,
+        ring_size: int = SLOW_QUERY_RING_SIZE,
+        explain: bool = SLOW_QUERY_EXPLAIN,
+    ):
+        self.threshold_ms = threshold_ms
+        self.top_n = top_n
+        self.explain = explain
+        self._lock = threading.Lock()
+        # route -> statement -> ringkasan
+        self._top: Dict[str, Dict[str, dict]] = {}
+        self.ring: deque = deque(maxlen=ring_size)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=100)
+        self._worker: Optional[threading.Thread] = None
+        self._local = threading.local()
+
+    def instrument(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None or getattr(self._local, "explaining", False):
+            return
+        ms = (time.perf_counter() - started) * 1000
+        if ms >= self.threshold_ms:
+            self.record(current_route() or "-", statement, parameters, ms, executemany, conn.engine)
+
+    def record(self, route: str, statement: str, parameters, ms: float, executemany: bool = False, engine=None):
+        shape = bentuk_parameter(parameters, executemany)
+        logger.warning("Query lambat %.1f ms [%s] %s params=%s", ms, route, statement[:MAX_STATEMENT_CHARS], shape)
+
+        with self._lock:
+            per_route = self._top.setdefault(route, {})
+            entry = per_route.get(statement)
+            if entry is None:
+                if len(per_route) >= self.top_n:
+                    tercepat = min(per_route, key=lambda s: per_route[s]["max_ms"])
+                    if per_route[tercepat]["max_ms"] >= ms:
+                        return
+                    del per_route[tercepat]
+                entry = per_route[statement] = {
+                    "statement": statement[:MAX_STATEMENT_CHARS],
+                    "params": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "explain_captured": False,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["last_seen"] = datetime.utcnow().isoformat(timespec="seconds")
+            perlu_explain = (
+                self.explain and engine is not None and not executemany
+                and not entry["explain_captured"]
+                and statement.lstrip()[:6].upper() == "SELECT"
+            )
+            if perlu_explain:
+                entry["explain_captured"] = True
+
+        if perlu_explain:
+            self._antre_explain(engine, route, statement, parameters, ms, shape)
+
+    def _antre_explain(self, engine, route, statement, parameters, ms, shape):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._explain_loop, daemon=True)
+                    self._worker.start()
+        try:
+            self._queue.put_nowait((engine, route, statement, parameters, ms, shape))
+        except queue.Full:
+            pass
+
+    def _explain_loop(self):
+        self._local.explaining = True
+        while True:
+            engine, route, statement, parameters, ms, shape = self._queue.get()
+            try:
+                prefix = _EXPLAIN_PREFIX.get(engine.dialect.name, "EXPLAIN ")
+                with engine.connect() as conn:
+                    result = conn.exec_driver_sql(prefix + statement, parameters)
+                    plan = [{k: str(v) for k, v in row._mapping.items()} for row in result]
+            except Exception as e:
+                plan = [{"error": str(e)}]
+            self.ring.append({
+                "waktu": datetime.utcnow().isoformat(timespec="seconds"),
+                "route": route,
+                "durasi_ms": round(ms, 2),
+                "statement": statement[:MAX_STATEMENT_CHARS],
+                "params": shape,
+                "explain": plan,
+            })
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = {
+                route: sorted(
+                    ({**e, "total_ms": round(e["total_ms"], 2), "max_ms": round(e["max_ms"], 2)} for e in per_route.values()),
+                    key=lambda e: e["max_ms"], reverse=True,
+                )
+                for route, per_route in sorted(self._top.items())
+            }
+        return {
+            "threshold_ms": self.threshold_ms,
+            "top_n": self.top_n,
+            "routes": routes,
+            "explain": list(reversed(self.ring)),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._top = {}
+            self.ring.clear()
+
+
+slow_query_log = SlowQueryLog()
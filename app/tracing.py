@@ -0,0 +1,416 @@
+# File: tracing.py
+"""
+Tracing request ringan di dalam proses.
+
+Request dipilih acak sebesar TRACE_SAMPLE_RATE (0 mematikan tracing).
+Untuk request terpilih, TracingMiddleware membuat satu trace berisi span:
+- dependencies: parsing body dan resolusi dependency (get_current_user,
+  get_db, ...), sampai endpoint mulai berjalan;
+- endpoint: badan fungsi endpoint;
+- render: validasi response_model dan serialisasi setelah endpoint selesai;
+- db <VERB>: setiap statement SQL (hook cursor_execute);
+- span eksplisit dari trace_span(), mis. jwt.decode dan bcrypt.verify.
+Span tidak saling mereferensikan saat direkam; induknya ditentukan di akhir
+dari rentang waktunya (span terkecil yang melingkupinya).
+
+Trace diekspor lewat thread latar sesuai TRACE_EXPORT:
+- "file": satu trace JSON per baris ke TRACE_FILE;
+- "otlp": OTLP/HTTP JSON ke TRACE_OTLP_ENDPOINT (collector OpenTelemetry,
+  Jaeger, Tempo), tanpa dependensi tambahan.
+Trace yang lebih lama dari TRACE_SLOW_MS disimpan di ring berukuran
+TRACE_RING_SIZE dan dapat dilihat admin di GET /debug/traces. Respons
+request terpilih membawa header X-Trace-Id.
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from typing import Callable, List, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "500"))
+TRACE_RING_SIZE = int(os.getenv("TRACE_RING_SIZE", "50"))
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "backend-gayabelajar")
+
+MAX_STATEMENT_CHARS = 1000
+EXPORT_BATCH_SIZE = 100
+EXPORT_INTERVAL_SECONDS = 2.0
+
+
+class Trace:
+    __slots__ = ("trace_id", "method", "path", "route", "status", "start_unix_ns", "t0", "t1", "spans", "dropped")
+
+    def __init__(self, method: str, path: str):
+        self.trace_id = os.urandom(16).hex()
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status = 500
+        self.start_unix_ns = time.time_ns()
+        self.t0 = time.perf_counter()
+        self.t1: Optional[float] = None
+        # [nama, mulai, selesai, atribut]; waktu dari perf_counter
+        self.spans: List[list] = []
+        self.dropped = 0
+
+    def add_span(self, name: str, start: float, end: float, **attributes):
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append([name, start, end, attributes])
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.t1 or time.perf_counter()) - self.t0) * 1000
+
+    def to_dict(self) -> dict:
+        root_id = os.urandom(8).hex()
+        root_end = self.t1 or time.perf_counter()
+        result = [{
+            "span_id": root_id,
+            "parent_id": None,
+            "name": f"{self.method} {self.route or self.path}",
+            "start_ms": 0.0,
+            "duration_ms": round((root_end - self.t0) * 1000, 3),
+            "attributes": {"http.method": self.method, "http.target": self.path, "http.status_code": self.status},
+        }]
+        # Span terluar lebih dulu; induk = span terakhir di tumpukan yang melingkupinya
+        stack = []
+        for name, start, end, attributes in sorted(self.spans, key=lambda s: (s[1], -s[2])):
+            while stack and not (stack[-1][1] <= start and end <= stack[-1][2]):
+                stack.pop()
+            span_id = os.urandom(8).hex()
+            result.append({
+                "span_id": span_id,
+                "parent_id": stack[-1][0] if stack else root_id,
+                "name": name,
+                "start_ms": round((start - self.t0) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+                "attributes": attributes,
+            })
+            stack.append((span_id, start, end))
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "route": self.route,
+            "path": self.path,
+            "status": self.status,
+            "start": datetime.utcfromtimestamp(self.start_unix_ns / 1e9).isoformat(timespec="milliseconds"),
+            "start_unix_ns": self.start_unix_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "dropped_spans": self.dropped,
+            "spans": result,
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """Rekam blok kode sebagai span; tanpa trace aktif hanya satu lookup contextvar."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start, time.perf_counter(), **attributes)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def ke_otlp(traces: List[dict], service_name: str = TRACE_SERVICE_NAME) -> dict:
+    """Bentuk payload ExportTraceServiceRequest (OTLP/HTTP JSON)."""
+    spans = []
+    for trace in traces:
+        for span in trace["spans"]:
+            start_ns = trace["start_unix_ns"] + int(span["start_ms"] * 1e6)
+            otlp_span = {
+                "traceId": trace["trace_id"],
+                "spanId": span["span_id"],
+                "name": span["name"],
+                # 2 = SERVER untuk span akar, 1 = INTERNAL
+                "kind": 2 if span["parent_id"] is None else 1,
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(start_ns + int(span["duration_ms"] * 1e6)),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span["attributes"].items()],
+            }
+            if span["parent_id"]:
+                otlp_span["parentSpanId"] = span["parent_id"]
+            if span["parent_id"] is None and trace["status"] >= 500:
+                otlp_span["status"] = {"code": 2}
+            spans.append(otlp_span)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": spans}],
+    }]}
+
+
+class TraceExporter:
+    """Mengirim trace secara batch dari thread latar; antrean penuh = trace dibuang."""
+
+    def __init__(self, write: Callable[[List[dict]], None]):
+        self.write = write
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def submit(self, trace: dict):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._loop, daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ambil_batch(self, timeout: float) -> List[dict]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < EXPORT_BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _kirim(self, batch: List[dict]):
+        if not batch:
+            return
+        try:
+            self.write(batch)
+        except Exception as e:
+            logger.warning("Ekspor %d trace gagal: %s", len(batch), e)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._kirim(self._ambil_batch(EXPORT_INTERVAL_SECONDS))
+
+    def stop(self, timeout: float = 5):
+        """Hentikan thread lalu kirim sisa antrean."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        while True:
+            batch = self._ambil_batch(0)
+            if not batch:
+                break
+            self._kirim(batch)
+
+
+def tulis_file(path: str) -> Callable[[List[dict]], None]:
+    def write(batch: List[dict]):
+        with open(path, "a", encoding="utf-8") as f:
+            for trace in batch:
+                f.write(json.dumps(trace, ensure_ascii=False, default=str) + "\n")
+    return write
+
+
+def kirim_otlp(endpoint: str) -> Callable[[List[dict]], None]:
+    def write(batch: List[dict]):
+        body = json.dumps(ke_otlp(batch), default=str).encode("utf-8")
+        request = urllib.request.Request(endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+    return write
+
+
+def buat_exporter(jenis: str = TRACE_EXPORT) -> Optional[TraceExporter]:
+    if jenis == "file":
+        return TraceExporter(tulis_file(TRACE_FILE))
+    if jenis == "otlp":
+        return TraceExporter(kirim_otlp(TRACE_OTLP_ENDPOINT))
+    if jenis:
+        logger.error("TRACE_EXPORT '%s' tidak dikenal; trace tidak diekspor", jenis)
+    return None
+
+
+class Tracer:
+    def __init__(
+        self,
+        sample_rate: float = TRACE_SAMPLE_RATE,
+        slow_ms: float = TRACE_SLOW_MS,
+        ring_size: int = TRACE_RING_SIZE,
+        exporter: Optional[TraceExporter] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.exporter = exporter
+        self.ring: deque = deque(maxlen=ring_size)
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def finish(self, trace: Trace):
+        trace.t1 = time.perf_counter()
+        slow = trace.duration_ms >= self.slow_ms
+        if self.exporter is None and not slow:
+            return
+        data = trace.to_dict()
+        if self.exporter is not None:
+            self.exporter.submit(data)
+        if slow:
+            self.ring.append(data)
+
+    def instrument(self, engine):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    def recent(self, limit: int = 20, min_ms: Optional[float] = None) -> List[dict]:
+        traces = [t for t in reversed(self.ring) if min_ms is None or t["duration_ms"] >= min_ms]
+        return traces[:limit]
+
+    def stop(self):
+        if self.exporter is not None:
+            self.exporter.stop()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_trace.get() is not None:
+        context._trace_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current_trace.get()
+    started = getattr(context, "_trace_started", None)
+    if trace is None or started is None:
+        return
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    trace.add_span(
+        f"db {verb}", started, time.perf_counter(),
+        **{"db.system": conn.dialect.name, "db.statement": statement[:MAX_STATEMENT_CHARS]}
+    )
+
+
+class TracingMiddleware:
+    def __init__(self, app, tracer: Optional[Tracer] = None):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        tracer_ = self.tracer or tracer
+        if scope["type"] != "http" or not tracer_.sampled():
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], scope["path"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-trace-id", trace.trace_id.encode())]}
+            await send(message)
+
+        token = _current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            route = scope.get("route")
+            trace.route = getattr(route, "path_format", None)
+            tracer_.finish(trace)
+
+
+def _bungkus_endpoint(call):
+    """Tandai mulai/selesai endpoint pada trace aktif, mempertahankan sync/async."""
+    if getattr(call, "_traced", False):
+        return call
+
+    if asyncio.iscoroutinefunction(call):
+        @wraps(call)
+        async def wrapper(**values):
+            trace = _current_trace.get()
+            if trace is None:
+                return await call(**values)
+            start = time.perf_counter()
+            try:
+                return await call(**values)
+            finally:
+                trace.add_span("endpoint", start, time.perf_counter())
+    else:
+        @wraps(call)
+        def wrapper(**values):
+            trace = _current_trace.get()
+            if trace is None:
+                return call(**values)
+            start = time.perf_counter()
+            try:
+                return call(**values)
+            finally:
+                trace.add_span("endpoint", start, time.perf_counter())
+    wrapper._traced = True
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """
+    route_class untuk APIRouter: memecah waktu handler menjadi span
+    dependencies (sebelum endpoint) dan render (setelah endpoint).
+    """
+
+    def get_route_handler(self):
+        self.dependant.call = _bungkus_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            trace = _current_trace.get()
+            if trace is None:
+                return await handler(request)
+            start = time.perf_counter()
+            n_spans = len(trace.spans)
+            try:
+                return await handler(request)
+            finally:
+                end = time.perf_counter()
+                endpoint = next((s for s in trace.spans[n_spans:] if s[0] == "endpoint"), None)
+                if endpoint is None:
+                    # Gagal sebelum endpoint (mis. 401/422 dari dependency)
+                    trace.add_span("dependencies", start, end)
+                else:
+                    trace.add_span("dependencies", start, endpoint[1])
+                    trace.add_span("render", endpoint[2], end)
+
+        return traced_handler
+
+
+tracer = Tracer(exporter=buat_exporter())
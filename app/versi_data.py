@@ -0,0 +1,108 @@
+# File: versi_data.py
+"""
+Registry versi data untuk conditional GET.
+
+Setiap penulisan menaikkan penghitung di tabel versi_data untuk entitas
+yang terdampak, di transaksi yang sama dengan perubahannya:
+- pengguna:<id>  hasil tes dan profil milik satu pengguna;
+- sekolah:<hash> data siswa/hasil tes di satu sekolah (dashboard guru);
+- katalog        katalog rekomendasi gaya belajar;
+- indeks_sekolah daftar sekolah (indeks autocomplete, lihat app.cache).
+
+Endpoint baca membentuk weak ETag dari versi kunci-kunci yang dipakainya
+(satu query PK) dan menjawab If-None-Match yang cocok dengan 304 sebelum
+menjalankan query data maupun serialisasi. Kunci yang belum pernah dinaikkan
+dianggap versi 0. ETAG_SALT (mis. ID rilis) ikut di-hash agar perubahan
+bentuk respons antar deploy tidak terjawab 304.
+"""
+import hashlib
+import os
+from typing import Dict, Optional, Sequence
+
+from fastapi import Request, Response
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import VersiData
+
+ETAG_SALT = os.getenv("ETAG_SALT", "")
+
+# Browser tetap merevalidasi setiap request; respons per pengguna tidak di-cache proxy
+CACHE_CONTROL = "private, no-cache"
+
+KATALOG = "katalog"
+INDEKS_SEKOLAH = "indeks_sekolah"
+
+
+def kunci_pengguna(id_pengguna: int) -> str:
+    return f"pengguna:{id_pengguna}"
+
+
+def kunci_sekolah(nama_sekolah: Optional[str]) -> Optional[str]:
+    # Nama kosong tetap diberi kunci agar siswa/guru tanpa sekolah ikut terinvalidasi
+    if nama_sekolah is None:
+        return None
+    # Di-hash agar muat di kolom kunci; dinormalisasi seperti collation MySQL (case-insensitive, PAD SPACE)
+    return "sekolah:" + hashlib.sha1(nama_sekolah.rstrip().lower().encode("utf-8")).hexdigest()[:32]
+
+
+def naikkan_versi(db: Session, *kunci: Optional[str]) -> None:
+    """Dipanggil sebelum commit perubahan; ikut dalam transaksi yang sama."""
+    kunci = sorted({k for k in kunci if k})
+    if not kunci:
+        return
+    naik = update(VersiData).values(versi=VersiData.versi + 1)
+    diperbarui = db.execute(
+        naik.where(VersiData.kunci.in_(kunci)),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    if diperbarui == len(kunci):
+        return
+
+    ada = {k for (k,) in db.query(VersiData.kunci).filter(VersiData.kunci.in_(kunci))}
+    for k in kunci:
+        if k in ada:
+            continue
+        try:
+            with db.begin_nested():
+                db.execute(insert(VersiData).values(kunci=k, versi=1))
+        except IntegrityError:
+            # Disisipkan oleh transaksi lain secara bersamaan
+            db.execute(naik.where(VersiData.kunci == k), execution_options={"synchronize_session": False})
+
+
+def get_versi(db: Session, kunci: Sequence[Optional[str]]) -> Dict[str, int]:
+    """Kunci None (mis. kunci_sekolah(None)) diabaikan, sama seperti naikkan_versi."""
+    versi = dict.fromkeys((k for k in kunci if k), 0)
+    if not versi:
+        return versi
+    versi.update(db.query(VersiData.kunci, VersiData.versi).filter(VersiData.kunci.in_(list(versi))))
+    return versi
+
+
+def buat_etag(db: Session, kunci: Sequence[Optional[str]], *varian) -> str:
+    """Weak ETag dari versi kunci ditambah varian respons (pengguna, query string)."""
+    versi = get_versi(db, kunci)
+    bahan = "|".join([ETAG_SALT, *(f"{k}={versi[k]}" for k in sorted(versi)), *map(str, varian)])
+    return f'W/"{hashlib.sha1(bahan.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def etag_cocok(request: Request, etag: str) -> bool:
+    """Perbandingan lemah If-None-Match (RFC 9110): prefiks W/ diabaikan."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == target for tag in header.split(","))
+
+
+def respons_304(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def pasang_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,75 @@
+# File: versi_soal.py
+"""
+Versi set soal.
+
+Setiap perubahan set soal mencatat baris VersiSoal baru di transaksi yang
+sama, sehingga nomor versi naik monoton. JawabanPengguna diberi cap versi
+yang dijawab agar cache dan analitik dapat diinvalidasi/dipartisi per versi.
+
+set_soal menyimpan daftar soal di memori per worker. Setiap get() hanya
+membaca nomor versi terkini (query MAX ringan) dan memuat ulang bila versi
+berubah, sehingga perubahan dari worker lain ikut terbaca.
+"""
+from threading import Lock
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import Soal, VersiSoal
+
+
+def get_versi_terkini(db: Session) -> Optional[VersiSoal]:
+    return db.query(VersiSoal).order_by(VersiSoal.id.desc()).first()
+
+
+def get_nomor_versi(db: Session) -> Optional[int]:
+    return db.query(func.max(VersiSoal.id)).scalar()
+
+
+def get_jumlah_soal(db: Session) -> int:
+    versi = get_versi_terkini(db)
+    if versi is not None:
+        return versi.jumlah_soal
+    # DB lama tanpa riwayat versi
+    return db.query(func.count(Soal.id)).scalar()
+
+
+def catat_versi_baru(db: Session) -> VersiSoal:
+    """Dipanggil sebelum commit perubahan soal; ikut dalam transaksi yang sama."""
+    db.flush()
+    versi = VersiSoal(jumlah_soal=db.query(func.count(Soal.id)).scalar())
+    db.add(versi)
+    db.flush()
+    return versi
+
+
+class SetSoalCache:
+    def __init__(self):
+        self._lock = Lock()
+        self._data: Optional[Tuple[Optional[int], List[dict]]] = None
+
+    def load(self, db: Session) -> List[dict]:
+        versi = get_nomor_versi(db)
+        soal = [
+            {"id": id, "pertanyaan": pertanyaan, "pilihan_a": pilihan_a, "pilihan_b": pilihan_b}
+            for id, pertanyaan, pilihan_a, pilihan_b in db.query(
+                Soal.id, Soal.pertanyaan, Soal.pilihan_a, Soal.pilihan_b
+            ).order_by(Soal.id)
+        ]
+        with self._lock:
+            self._data = (versi, soal)
+        return soal
+
+    def get(self, db: Session) -> List[dict]:
+        data = self._data
+        if data is None or data[0] != get_nomor_versi(db):
+            return self.load(db)
+        return data[1]
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+
+set_soal = SetSoalCache()
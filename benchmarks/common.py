@@ -0,0 +1,38 @@
+# File: benchmarks/common.py
+"""Utilitas bersama benchmark: identitas commit dan riwayat hasil JSON."""
+import json
+import os
+import subprocess
+from datetime import datetime
+from typing import List, Optional
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def baca_riwayat(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def tambah_riwayat(path: str, hasil: dict) -> dict:
+    """Tambahkan satu run (dengan commit dan waktu) ke file riwayat JSON."""
+    record = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        **hasil,
+    }
+    riwayat = baca_riwayat(path)
+    riwayat.append(record)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(riwayat, f, indent=2)
+    return record
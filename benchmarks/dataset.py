@@ -0,0 +1,266 @@
+# File: benchmarks/dataset.py
+"""
+Generator dataset sintetis untuk benchmark dan uji kapasitas.
+
+Mengisi Sekolah, Pengguna, Siswa, Guru, JawabanPengguna dan
+HasilGayaBelajar dalam skala yang bisa diatur, dengan INSERT multi-baris per
+chunk (satu transaksi per chunk). Jawaban dibangkitkan dari kecenderungan
+tiap siswa per dimensi, lalu dinilai dengan aturan yang sama dengan
+submit_jawaban (hitung_skor_bit + kategorisasi_*), sehingga distribusi
+kategori realistis dan konsisten dengan data produksi.
+
+Email mengikuti pola siswa{n}@<domain> / guru{n}@<domain> dengan password
+PASSWORD, sehingga benchmarks.load_test --skip-seed dapat langsung login.
+
+Pemakaian (memakai DATABASE_URL):
+    python -m benchmarks.dataset --sekolah 5000 --siswa 2000000 --tes-rata 1.5
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, engine, insert_ignore
+from app.jawaban_bit import DIMENSI_RENTANG, hitung_skor_bit
+from app.models import (
+    Base, Guru, HasilGayaBelajar, JawabanPengguna, Pengguna, PeranEnum, RekomendasiGayaBelajar, Sekolah, Siswa,
+    Soal, VersiSoal,
+)
+from app.routers.soal import (
+    kategorisasi_input, kategorisasi_pemahaman, kategorisasi_pemrosesan, kategorisasi_persepsi,
+)
+from app.security import get_password_hash
+from app.versi_soal import get_nomor_versi
+
+PASSWORD = "Benchmark123"
+# Domain harus lolos EmailStr di skema respons; .local adalah domain khusus yang ditolak
+DOMAIN = "example.com"
+CHUNK_SIZE = 5000
+
+DIMENSI = ("pemrosesan", "persepsi", "input", "pemahaman")
+KUTUB = {
+    "pemrosesan": ("Aktif", "Reflektif"),
+    "persepsi": ("Sensing", "Intuitif"),
+    "input": ("Visual", "Verbal"),
+    "pemahaman": ("Sequential", "Global"),
+}
+# Rata-rata peluang memilih A per dimensi; populasi siswa umumnya condong visual
+RATA_PELUANG_A = {"pemrosesan": 0.55, "persepsi": 0.6, "input": 0.68, "pemahaman": 0.5}
+SEBARAN_PELUANG_A = 0.17
+
+KATEGORISASI = {
+    "pemrosesan": kategorisasi_pemrosesan,
+    "persepsi": kategorisasi_persepsi,
+    "input": kategorisasi_input,
+    "pemahaman": kategorisasi_pemahaman,
+}
+
+
+def pastikan_data_master(db: Session):
+    """Isi soal, versi soal, dan katalog rekomendasi bila masih kosong."""
+    if not db.query(Soal.id).first():
+        db.execute(insert(Soal), [
+            {"id": n, "pertanyaan": f"Pertanyaan {n}", "pilihan_a": "Pilihan A", "pilihan_b": "Pilihan B"}
+            for n in range(1, 45)
+        ])
+    if not db.query(VersiSoal.id).first():
+        db.add(VersiSoal(jumlah_soal=db.query(func.count(Soal.id)).scalar()))
+    if not db.query(RekomendasiGayaBelajar.id).first():
+        rows = []
+        for dimensi in DIMENSI:
+            for kutub in KUTUB[dimensi]:
+                for tingkat in ("Rendah", "Sedang", "Kuat"):
+                    gaya = f"{kutub} {tingkat}"
+                    rows.append({
+                        "kategori": dimensi, "gaya_belajar": gaya,
+                        "penjelasan": f"Penjelasan {gaya}", "rekomendasi": f"Rekomendasi {gaya}",
+                    })
+            rows.append({
+                "kategori": dimensi, "gaya_belajar": "Default",
+                "penjelasan": f"Penjelasan umum {dimensi}", "rekomendasi": f"Rekomendasi umum {dimensi}",
+            })
+        db.execute(insert(RekomendasiGayaBelajar), rows)
+    db.commit()
+
+
+def _bangkitkan_bits(rng: random.Random, peluang: Dict[str, float]) -> int:
+    bits = 0
+    for dimensi, (start, end) in DIMENSI_RENTANG.items():
+        p = peluang[dimensi]
+        for id_soal in range(start, end + 1):
+            if rng.random() < p:
+                bits |= 1 << (id_soal - 1)
+    return bits
+
+
+def _nilai(bits: int, rekomendasi: Dict[Tuple[str, str], int]) -> dict:
+    """Skor dan kategori dengan aturan submit_jawaban."""
+    hasil = {}
+    for dimensi, skor in hitung_skor_bit(bits).items():
+        kategori = KATEGORISASI[dimensi](skor)
+        hasil[f"skor_{dimensi}"] = abs(skor)
+        hasil[f"kategori_{dimensi}"] = kategori
+        hasil[f"id_rekomendasi_{dimensi}"] = rekomendasi.get(
+            (dimensi, kategori.casefold()), rekomendasi.get((dimensi, "default"))
+        )
+    return hasil
+
+
+def _jumlah_tes(rng: random.Random, tes_rata: float, belum_tes: float) -> int:
+    if rng.random() < belum_tes:
+        return 0
+    # 1 + Poisson(tes_rata - 1): sebagian besar sekali, sebagian mengulang
+    lam = max(0.0, tes_rata - 1)
+    n, p, batas = 1, 1.0, math.exp(-lam)
+    while True:
+        p *= rng.random()
+        if p <= batas:
+            return n
+        n += 1
+
+
+def generate(
+    db: Session,
+    sekolah: int,
+    siswa: int,
+    guru_per_sekolah: int = 2,
+    tes_rata: float = 1.5,
+    belum_tes: float = 0.1,
+    hari: int = 365,
+    domain: str = DOMAIN,
+    chunk_size: int = CHUNK_SIZE,
+    seed: int = 1,
+    progress=None,
+) -> dict:
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    pastikan_data_master(db)
+    versi = get_nomor_versi(db)
+    rekomendasi = {
+        (kategori.casefold(), gaya.casefold()): id
+        for id, kategori, gaya in db.query(
+            RekomendasiGayaBelajar.id, RekomendasiGayaBelajar.kategori, RekomendasiGayaBelajar.gaya_belajar
+        )
+    }
+    # Satu hash dipakai semua akun: bcrypt per akun akan mendominasi waktu
+    kata_sandi = get_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    nama_sekolah = [f"Sekolah Sintetis {n:05d}" for n in range(1, sekolah + 1)]
+    next_id = (db.query(func.max(Pengguna.id)).scalar() or 0) + 1
+    counts = {"sekolah": 0, "siswa": 0, "guru": 0, "jawaban": 0}
+
+    for i in range(0, sekolah, chunk_size):
+        db.execute(insert_ignore(db, Sekolah).values([{"nama_sekolah": n} for n in nama_sekolah[i:i + chunk_size]]))
+    db.commit()
+    counts["sekolah"] = sekolah
+
+    jumlah_guru = sekolah * guru_per_sekolah
+    for start in range(1, jumlah_guru + 1, chunk_size):
+        nomor = range(start, min(jumlah_guru, start + chunk_size - 1) + 1)
+        ids = range(next_id, next_id + len(nomor))
+        db.execute(insert(Pengguna), [
+            {"id": pid, "email": f"guru{n}@{domain}", "kata_sandi": kata_sandi, "peran": PeranEnum.guru, "dibuat_pada": now}
+            for pid, n in zip(ids, nomor)
+        ])
+        db.execute(insert(Guru), [
+            {
+                "id_pengguna": pid, "nip": f"{seed:02d}{n:016d}", "nama_lengkap": f"Guru {n}",
+                "nomor_telepon": "081234567890", "tanggal_lahir": date(1970 + n % 30, n % 12 + 1, n % 28 + 1),
+                "jenis_kelamin": "Perempuan" if n % 3 else "Laki-Laki", "tingkat_pendidikan": ("S1", "S2")[n % 5 == 0],
+                # guru{n} mengajar di sekolah ke-(n mod sekolah), sama dengan siswa{n}
+                "nama_sekolah": nama_sekolah[n % sekolah],
+            }
+            for pid, n in zip(ids, nomor)
+        ])
+        db.commit()
+        next_id += len(nomor)
+        counts["guru"] += len(nomor)
+
+    for start in range(1, siswa + 1, chunk_size):
+        nomor = range(start, min(siswa, start + chunk_size - 1) + 1)
+        ids = range(next_id, next_id + len(nomor))
+        pengguna_rows, siswa_rows, jawaban_rows, hasil_rows = [], [], [], []
+        for pid, n in zip(ids, nomor):
+            pengguna_rows.append({"id": pid, "email": f"siswa{n}@{domain}", "kata_sandi": kata_sandi, "peran": PeranEnum.siswa, "dibuat_pada": now})
+            siswa_rows.append({
+                "id_pengguna": pid, "nisn": f"{seed:02d}{n:010d}", "nama_lengkap": f"Siswa {n}",
+                "nomor_telepon": "081234567890", "tanggal_lahir": date(2005 + n % 5, n % 12 + 1, n % 28 + 1),
+                "jenis_kelamin": "Perempuan" if n % 2 else "Laki-Laki",
+                "kelas": f"{('X', 'XI', 'XII')[n % 3]}-{n % 6 + 1}", "nama_sekolah": nama_sekolah[n % sekolah],
+            })
+            peluang = {
+                d: min(0.95, max(0.05, rng.gauss(RATA_PELUANG_A[d], SEBARAN_PELUANG_A))) for d in DIMENSI
+            }
+            for _ in range(_jumlah_tes(rng, tes_rata, belum_tes)):
+                waktu = now - timedelta(seconds=rng.randint(0, hari * 86400))
+                # Tes ulang sedikit bergeser dari kecenderungan awal
+                bits = _bangkitkan_bits(rng, {d: min(0.95, max(0.05, p + rng.gauss(0, 0.05))) for d, p in peluang.items()})
+                jawaban_rows.append({
+                    "id_pengguna": pid, "jawaban_bit": bits, "jumlah_jawaban": 44,
+                    "versi_soal": versi, "dijawab_pada": waktu,
+                })
+                hasil_rows.append({"id_pengguna": pid, "dibuat_pada": waktu, **_nilai(bits, rekomendasi)})
+
+        db.execute(insert(Pengguna), pengguna_rows)
+        db.execute(insert(Siswa), siswa_rows)
+        if jawaban_rows:
+            db.execute(insert(JawabanPengguna), jawaban_rows)
+            db.execute(insert(HasilGayaBelajar), hasil_rows)
+        db.commit()
+        next_id += len(nomor)
+        counts["siswa"] += len(nomor)
+        counts["jawaban"] += len(jawaban_rows)
+        if progress:
+            progress(counts, time.perf_counter() - started)
+
+    durasi = time.perf_counter() - started
+    total_baris = counts["sekolah"] + 2 * (counts["guru"] + counts["siswa"] + counts["jawaban"])
+    return {
+        **counts,
+        "hasil": counts["jawaban"],
+        "durasi_detik": round(durasi, 2),
+        "baris_per_detik": round(total_baris / durasi, 1) if durasi else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Bangkitkan dataset sintetis berskala produksi")
+    parser.add_argument("--sekolah", type=int, default=100)
+    parser.add_argument("--siswa", type=int, default=10000)
+    parser.add_argument("--guru-per-sekolah", type=int, default=2)
+    parser.add_argument("--tes-rata", type=float, default=1.5, help="Rata-rata jumlah tes per siswa yang sudah tes")
+    parser.add_argument("--belum-tes", type=float, default=0.1, help="Proporsi siswa yang belum pernah tes")
+    parser.add_argument("--hari", type=int, default=365, help="Rentang tanggal tes ke belakang")
+    parser.add_argument("--domain", default=DOMAIN, help="Domain email akun sintetis")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--create-tables", action="store_true", help="Jalankan create_all dulu (DB dev/SQLite)")
+    args = parser.parse_args(argv)
+
+    if args.create_tables:
+        Base.metadata.create_all(engine)
+
+    def progress(counts, elapsed):
+        print(f"{counts['siswa']}/{args.siswa} siswa, {counts['jawaban']} jawaban, {elapsed:.0f} detik", file=sys.stderr)
+
+    db = SessionLocal()
+    try:
+        report = generate(
+            db, args.sekolah, args.siswa, args.guru_per_sekolah, args.tes_rata, args.belum_tes,
+            args.hari, args.domain, args.chunk_size, args.seed, progress,
+        )
+    finally:
+        db.close()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# File: benchmarks/load_test.py
+"""
+Load test end-to-end dengan profil lalu lintas hari ujian.
+
+Menjalankan server produksi (python -m app.server) pada database lokal
+(SQLite di direktori sementara, atau --database-url untuk MySQL), mengisi
+data dengan benchmarks.dataset, lalu mensimulasikan:
+- siswa: login, GET /soal/, POST /soal/submit (datang bergelombang dalam
+  --ramp detik), lalu polling GET /soal/dashboard-siswa;
+- guru: login, lalu bergantian GET /guru/dashboard dan
+  GET /guru/siswa-export-simple selama siswa masih mengerjakan.
+
+Hasilnya JSON per route (jumlah, error, req/s, p50/p95/p99/max ms) beserta
+commit git, agar bisa dibandingkan antar commit:
+
+    python -m benchmarks.load_test --siswa 200 --guru 10 --output hasil.json
+    python -m benchmarks.load_test --compare baseline.json --tolerance 0.2
+
+--compare mengembalikan exit code 1 bila p95 suatu route memburuk lebih
+dari --tolerance (relatif) atau throughput turun lebih dari itu.
+"""
+import argparse
+import asyncio
+import http.cookiejar
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import git_commit
+
+# Sama dengan benchmarks.dataset.PASSWORD/DOMAIN (tidak diimpor agar DATABASE_URL bisa diset dulu)
+PASSWORD = "Benchmark123"
+DOMAIN = "example.com"
+
+
+class _NoCookies(http.cookiejar.CookieJar):
+    # Cookie access_token diprioritaskan server; tiap virtual user memakai header sendiri
+    def set_cookie(self, cookie):
+        pass
+
+    def extract_cookies(self, response, request):
+        pass
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies[label].append((time.perf_counter() - started) * 1000)
+        if response is None or response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+
+
+def _percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+def ringkas(recorder: Recorder, duration: float) -> dict:
+    routes = {}
+    for label, values in sorted(recorder.latencies.items()):
+        routes[label] = {
+            "count": len(values),
+            "errors": recorder.errors.get(label, 0),
+            "rps": round(len(values) / duration, 2),
+            "p50_ms": round(_percentile(values, 50), 2),
+            "p95_ms": round(_percentile(values, 95), 2),
+            "p99_ms": round(_percentile(values, 99), 2),
+            "max_ms": round(max(values), 2),
+        }
+    total = sum(r["count"] for r in routes.values())
+    return {
+        "duration_s": round(duration, 2),
+        "total_requests": total,
+        "total_errors": sum(r["errors"] for r in routes.values()),
+        "throughput_rps": round(total / duration, 2),
+        "routes": routes,
+    }
+
+
+async def _login(client, recorder, email) -> Optional[dict]:
+    response = await recorder.call(
+        client, "POST /auth/login", "POST", "/auth/login",
+        data={"username": email, "password": PASSWORD},
+    )
+    if response is None or response.status_code != 200:
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def siswa_flow(client, recorder, i, args, delay):
+    await asyncio.sleep(delay)
+    headers = await _login(client, recorder, f"siswa{i}@{DOMAIN}")
+    if headers is None:
+        return
+    await recorder.call(client, "GET /soal/", "GET", "/soal/", headers=headers)
+    # Waktu mengerjakan soal
+    await asyncio.sleep(random.uniform(0, args.think))
+    jawaban = [{"id_soal": n, "pilihan": random.choice("AB")} for n in range(1, 45)]
+    await recorder.call(client, "POST /soal/submit", "POST", "/soal/submit", json=jawaban, headers=headers)
+    for _ in range(args.polls):
+        await recorder.call(client, "GET /soal/dashboard-siswa", "GET", "/soal/dashboard-siswa", headers=headers)
+        await asyncio.sleep(args.poll_interval)
+
+
+async def guru_flow(client, recorder, j, args, selesai: asyncio.Event):
+    headers = await _login(client, recorder, f"guru{j}@{DOMAIN}")
+    if headers is None:
+        return
+    while not selesai.is_set():
+        await recorder.call(client, "GET /guru/dashboard", "GET", "/guru/dashboard", headers=headers)
+        await recorder.call(client, "GET /guru/siswa-export-simple", "GET", "/guru/siswa-export-simple", headers=headers)
+        try:
+            await asyncio.wait_for(selesai.wait(), args.guru_interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def jalankan_beban(base_url: str, args) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout, cookies=_NoCookies()) as client:
+        selesai = asyncio.Event()
+        started = time.perf_counter()
+        siswa = [
+            asyncio.create_task(siswa_flow(client, recorder, i, args, random.uniform(0, args.ramp)))
+            for i in range(1, args.siswa + 1)
+        ]
+        guru = [asyncio.create_task(guru_flow(client, recorder, j, args, selesai)) for j in range(1, args.guru + 1)]
+        await asyncio.gather(*siswa)
+        selesai.set()
+        await asyncio.gather(*guru)
+        duration = time.perf_counter() - started
+    return ringkas(recorder, duration)
+
+
+def seed(database_url: str, jumlah_siswa: int, jumlah_guru: int):
+    """Isi database kosong lewat generator dataset; guru{j} satu sekolah dengan siswa{j}."""
+    os.environ["DATABASE_URL"] = database_url
+    from benchmarks import dataset
+
+    dataset.Base.metadata.create_all(dataset.engine)
+    db = dataset.SessionLocal()
+    try:
+        dataset.generate(db, sekolah=max(1, jumlah_guru), siswa=jumlah_siswa, guru_per_sekolah=1)
+    finally:
+        db.close()
+        dataset.engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(database_url: str, workers: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "PORT": str(port),
+        "HOST": "127.0.0.1",
+        "WEB_CONCURRENCY": str(workers),
+        "QUERY_BUDGET_MODE": "off",
+    }
+    # Log ke file, bukan PIPE, agar server tidak macet saat buffer pipe penuh
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen([sys.executable, "-m", "app.server"], env=env, stdout=subprocess.DEVNULL, stderr=log)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"Server berhenti saat start:\n{log.read().decode()[-2000:]}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1).status_code < 500:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server tidak siap dalam 60 detik")
+
+
+def bandingkan(hasil: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Kembalikan daftar regresi dibanding baseline."""
+    regresi = []
+    for label, route in hasil["routes"].items():
+        lama = baseline.get("routes", {}).get(label)
+        if not lama or not lama["p95_ms"]:
+            continue
+        perubahan = (route["p95_ms"] - lama["p95_ms"]) / lama["p95_ms"]
+        print(f"{label:35s} p95 {lama['p95_ms']:9.2f} -> {route['p95_ms']:9.2f} ms ({perubahan:+.0%})")
+        if perubahan > tolerance:
+            regresi.append(f"{label}: p95 naik {perubahan:.0%}")
+    if baseline.get("throughput_rps"):
+        perubahan = (hasil["throughput_rps"] - baseline["throughput_rps"]) / baseline["throughput_rps"]
+        print(f"{'throughput':35s}     {baseline['throughput_rps']:9.2f} -> {hasil['throughput_rps']:9.2f} rps ({perubahan:+.0%})")
+        if perubahan < -tolerance:
+            regresi.append(f"throughput turun {-perubahan:.0%}")
+    return regresi
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load test profil hari ujian")
+    parser.add_argument("--url", help="Pakai server yang sudah berjalan (tanpa seed/start)")
+    parser.add_argument("--database-url", help="Database kosong untuk di-seed (default: SQLite sementara)")
+    parser.add_argument("--skip-seed", action="store_true", help="Database sudah berisi data benchmark")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--siswa", type=int, default=100)
+    parser.add_argument("--guru", type=int, default=5)
+    parser.add_argument("--ramp", type=float, default=10, help="Siswa datang dalam rentang N detik")
+    parser.add_argument("--think", type=float, default=5, help="Waktu maksimal mengerjakan soal (detik)")
+    parser.add_argument("--polls", type=int, default=3)
+    parser.add_argument("--poll-interval", type=float, default=2)
+    parser.add_argument("--guru-interval", type=float, default=3)
+    parser.add_argument("--concurrency", type=int, default=100, help="Maksimal koneksi HTTP bersamaan")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1, help="Seed random agar profil bisa diulang")
+    parser.add_argument("--output", help="Tulis hasil JSON ke file ini")
+    parser.add_argument("--compare", help="Baseline JSON untuk dibandingkan")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+
+    server = None
+    tmpdir = None
+    try:
+        if args.url:
+            base_url = args.url
+        else:
+            database_url = args.database_url
+            if not database_url:
+                tmpdir = tempfile.TemporaryDirectory()
+                database_url = f"sqlite:///{tmpdir.name}/benchmark.sqlite"
+            if not args.skip_seed:
+                seed(database_url, args.siswa, args.guru)
+            port = _free_port()
+            server = start_server(database_url, args.workers, port)
+            base_url = f"http://127.0.0.1:{port}"
+
+        hasil = asyncio.run(jalankan_beban(base_url, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    hasil = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        **hasil,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(hasil, f, indent=2)
+    json.dump(hasil, sys.stdout, indent=2)
+    print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regresi = bandingkan(hasil, json.load(f), args.tolerance)
+        for r in regresi:
+            print(f"REGRESI: {r}", file=sys.stderr)
+        if regresi:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# File: benchmarks/response_serialization.py
+"""
+Microbenchmark biaya serialisasi respons daftar per baris.
+
+Baris diambil dari query SQLite in-memory (objek Row SQLAlchemy, seperti
+paginate()) dengan bentuk SiswaResponse, lalu diubah menjadi body JSON
+SiswaListResponse dengan beberapa cara:
+- validasi_ganda: objek SiswaResponse per baris, lalu serialize_response
+  FastAPI (dump, validasi ulang response_model) dan JSONResponse (jalur lama
+  daftar admin);
+- model_construct: model_construct per baris tanpa validasi, lalu dump_json
+  TypeAdapter yang di-cache;
+- model_response: ModelResponse dari baris_ke_dict() (satu validasi dan
+  serialisasi di pydantic-core; jalur baru);
+- fast_json: FastJSONResponse dari dict (orjson, tanpa skema).
+
+Hasil dalam mikrodetik per baris untuk setiap ukuran daftar; ditambahkan ke
+file riwayat JSON per commit.
+
+    python -m benchmarks.response_serialization --rows 100 1000 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+from benchmarks.common import tambah_riwayat
+from benchmarks.submit_stages import ukur
+
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), "history", "response_serialization.json")
+
+
+def buat_baris(n: int) -> list:
+    from sqlalchemy import create_engine
+
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE siswa (id INTEGER, email TEXT, nama_lengkap TEXT, jenis_kelamin TEXT, nama_sekolah TEXT)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO siswa VALUES (?, ?, ?, ?, ?)",
+            [(i, f"siswa{i}@example.com", f"Siswa Benchmark {i}", "Laki-Laki", f"SMA Bench {i % 50}") for i in range(n)],
+        )
+        rows = conn.exec_driver_sql("SELECT id, email, nama_lengkap, jenis_kelamin, nama_sekolah FROM siswa").all()
+    engine.dispose()
+    return rows
+
+
+def jalankan(ukuran: List[int], number: int, repeat: int) -> Dict[str, Dict[str, dict]]:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+
+    from app.fast_response import FastJSONResponse, ModelResponse, adapter, baris_ke_dict
+    from app.schemas.admin import SiswaListResponse, SiswaResponse
+
+    field = create_model_field("response", SiswaListResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+    hasil = {}
+    try:
+        for n in ukuran:
+            rows = buat_baris(n)
+            fields = tuple(SiswaResponse.model_fields)
+            # Jumlah operasi per ulangan diskalakan agar setiap ukuran memproses ±number×1000 baris
+            ops = max(1, number * 1000 // max(n, 1))
+
+            def validasi_ganda():
+                data = SiswaListResponse(
+                    data=[
+                        SiswaResponse(
+                            id=row.id,
+                            email=row.email,
+                            nama_lengkap=row.nama_lengkap,
+                            jenis_kelamin=row.jenis_kelamin,
+                            nama_sekolah=row.nama_sekolah
+                        ) for row in rows
+                    ],
+                    total=n,
+                    next_cursor=None
+                )
+                content = loop.run_until_complete(serialize_response(field=field, response_content=data, is_coroutine=True))
+                JSONResponse(content)
+
+            def model_construct():
+                construct = SiswaResponse.model_construct
+                data = SiswaListResponse.model_construct(
+                    data=[construct(**dict(zip(fields, row))) for row in rows], total=n, next_cursor=None
+                )
+                adapter(SiswaListResponse).dump_json(data)
+
+            def model_response():
+                ModelResponse({"data": baris_ke_dict(rows), "total": n, "next_cursor": None}, SiswaListResponse)
+
+            def fast_json():
+                FastJSONResponse({"data": baris_ke_dict(rows), "total": n, "next_cursor": None})
+
+            hasil[str(n)] = {}
+            for nama, fn in (
+                ("validasi_ganda", validasi_ganda),
+                ("model_construct", model_construct),
+                ("model_response", model_response),
+                ("fast_json", fast_json),
+            ):
+                waktu = ukur(fn, ops, repeat)
+                hasil[str(n)][nama] = {k: round(v / n, 4) for k, v in waktu.items()}
+    finally:
+        loop.close()
+    return hasil
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Microbenchmark serialisasi respons per baris")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000], help="Ukuran daftar")
+    parser.add_argument("--number", type=int, default=20, help="Ribuan baris per ulangan")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--history", default=HISTORY_PATH, help="File riwayat JSON")
+    parser.add_argument("--no-save", action="store_true", help="Jangan tambahkan ke riwayat")
+    args = parser.parse_args(argv)
+
+    # app.database dimuat lewat impor skema; tidak ada koneksi yang dibuka
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    ukuran = jalankan(args.rows, args.number, args.repeat)
+
+    hasil = {
+        "config": {"number": args.number, "repeat": args.repeat, "python": sys.version.split()[0]},
+        "us_per_row": ukuran,
+    }
+    if not args.no_save:
+        hasil = tambah_riwayat(args.history, hasil)
+    json.dump(hasil, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
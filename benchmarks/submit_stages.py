@@ -0,0 +1,207 @@
+# File: benchmarks/submit_stages.py
+"""
+Microbenchmark tahap-tahap submit_jawaban.
+
+Setiap tahap diukur terpisah dengan kode yang sama dengan endpoint:
+- parsing: json.loads + validasi List[JawabanSubmit] (seperti FastAPI)
+- skor: hitung_skor_dimensi untuk 4 dimensi
+- skor_bit: encode_jawaban + hitung_skor_bit (alternatif bitmask)
+- kategorisasi: kategorisasi_* untuk 4 dimensi
+- rekomendasi: katalog_rekomendasi.get untuk 4 dimensi (cache hangat)
+- orm_flush: add JawabanPengguna + HasilGayaBelajar lalu flush (rollback
+  di luar pengukuran)
+
+Hasil (median/min mikrodetik per operasi) ditambahkan ke file riwayat JSON
+per commit; --compare membandingkan dengan run terakhir dan keluar dengan
+kode 1 bila ada tahap yang melambat lebih dari --tolerance.
+
+    python -m benchmarks.submit_stages --compare
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.common import baca_riwayat, tambah_riwayat
+
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), "history", "submit_stages.json")
+
+
+def ukur(fn: Callable, number: int, repeat: int) -> Dict[str, float]:
+    """Median dan minimum waktu per operasi (mikrodetik) dari beberapa ulangan."""
+    per_op = []
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        per_op.append((time.perf_counter_ns() - started) / number / 1000)
+    return {"median_us": round(statistics.median(per_op), 3), "min_us": round(min(per_op), 3)}
+
+
+def ukur_dengan_teardown(fn: Callable, teardown: Callable, number: int, repeat: int) -> Dict[str, float]:
+    per_op = []
+    for _ in range(repeat):
+        total = 0
+        for _ in range(number):
+            started = time.perf_counter_ns()
+            fn()
+            total += time.perf_counter_ns() - started
+            teardown()
+        per_op.append(total / number / 1000)
+    return {"median_us": round(statistics.median(per_op), 3), "min_us": round(min(per_op), 3)}
+
+
+def jalankan(number: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    # Impor di sini: DATABASE_URL harus sudah diset sebelum app.database dimuat
+    from pydantic import TypeAdapter
+
+    from app.database import SessionLocal, engine
+    from app.jawaban_bit import encode_jawaban, hitung_skor_bit
+    from app.katalog_rekomendasi import katalog_rekomendasi
+    from app.models import Base, HasilGayaBelajar, JawabanPengguna, Pengguna, PeranEnum
+    from app.routers.soal import (
+        hitung_skor_dimensi, kategorisasi_input, kategorisasi_pemahaman, kategorisasi_pemrosesan,
+        kategorisasi_persepsi,
+    )
+    from app.schemas.soal import JawabanSubmit
+    from benchmarks.dataset import pastikan_data_master
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    pastikan_data_master(db)
+    pengguna = db.query(Pengguna).filter(Pengguna.email == "microbench@example.com").first()
+    if pengguna is None:
+        pengguna = Pengguna(email="microbench@example.com", kata_sandi="-", peran=PeranEnum.siswa)
+        db.add(pengguna)
+        db.commit()
+    id_pengguna = pengguna.id
+
+    rng = random.Random(1)
+    payload = [{"id_soal": n, "pilihan": rng.choice("AB")} for n in range(1, 45)]
+    body = json.dumps(payload).encode()
+    adapter = TypeAdapter(List[JawabanSubmit])
+    jawaban = adapter.validate_python(payload)
+    jawaban_dict = {j.id_soal: j.pilihan.upper() for j in jawaban}
+    jawaban_list = [{"id_soal": j.id_soal, "pilihan": j.pilihan.upper()} for j in jawaban]
+
+    skor = {
+        "pemrosesan": hitung_skor_dimensi(jawaban_dict, 1, 11),
+        "persepsi": hitung_skor_dimensi(jawaban_dict, 12, 22),
+        "input": hitung_skor_dimensi(jawaban_dict, 23, 33),
+        "pemahaman": hitung_skor_dimensi(jawaban_dict, 34, 44),
+    }
+    kategori = {
+        "pemrosesan": kategorisasi_pemrosesan(skor["pemrosesan"]),
+        "persepsi": kategorisasi_persepsi(skor["persepsi"]),
+        "input": kategorisasi_input(skor["input"]),
+        "pemahaman": kategorisasi_pemahaman(skor["pemahaman"]),
+    }
+    katalog_rekomendasi.load(db)
+    rekomendasi = {d: katalog_rekomendasi.get(db, d, k).id for d, k in kategori.items()}
+
+    def parsing():
+        adapter.validate_python(json.loads(body))
+
+    def skor_dict():
+        hitung_skor_dimensi(jawaban_dict, 1, 11)
+        hitung_skor_dimensi(jawaban_dict, 12, 22)
+        hitung_skor_dimensi(jawaban_dict, 23, 33)
+        hitung_skor_dimensi(jawaban_dict, 34, 44)
+
+    def skor_bit():
+        hitung_skor_bit(encode_jawaban(jawaban_list)[0])
+
+    def kategorisasi():
+        kategorisasi_pemrosesan(skor["pemrosesan"])
+        kategorisasi_persepsi(skor["persepsi"])
+        kategorisasi_input(skor["input"])
+        kategorisasi_pemahaman(skor["pemahaman"])
+
+    def resolusi_rekomendasi():
+        for d, k in kategori.items():
+            katalog_rekomendasi.get(db, d, k)
+
+    def orm_flush():
+        db.add(JawabanPengguna(id_pengguna=id_pengguna, jawaban=jawaban_list))
+        db.add(HasilGayaBelajar(
+            id_pengguna=id_pengguna,
+            **{f"skor_{d}": abs(s) for d, s in skor.items()},
+            **{f"kategori_{d}": k for d, k in kategori.items()},
+            **{f"id_rekomendasi_{d}": r for d, r in rekomendasi.items()},
+        ))
+        db.flush()
+
+    try:
+        hasil = {
+            "parsing": ukur(parsing, number, repeat),
+            "skor": ukur(skor_dict, number * 10, repeat),
+            "skor_bit": ukur(skor_bit, number * 10, repeat),
+            "kategorisasi": ukur(kategorisasi, number * 10, repeat),
+            "rekomendasi": ukur(resolusi_rekomendasi, number * 10, repeat),
+            "orm_flush": ukur_dengan_teardown(orm_flush, db.rollback, max(1, number // 10), repeat),
+        }
+    finally:
+        db.rollback()
+        db.close()
+        engine.dispose()
+    return hasil
+
+
+def bandingkan(sekarang: Dict[str, dict], sebelumnya: Dict[str, dict], tolerance: float) -> List[str]:
+    regresi = []
+    for tahap, nilai in sekarang.items():
+        lama = sebelumnya.get(tahap)
+        if not lama or not lama["median_us"]:
+            continue
+        perubahan = (nilai["median_us"] - lama["median_us"]) / lama["median_us"]
+        print(f"{tahap:14s} {lama['median_us']:10.2f} -> {nilai['median_us']:10.2f} us ({perubahan:+.0%})")
+        if perubahan > tolerance:
+            regresi.append(f"{tahap}: median naik {perubahan:.0%}")
+    return regresi
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Microbenchmark tahap submit_jawaban")
+    parser.add_argument("--number", type=int, default=200, help="Operasi per ulangan (tahap cepat dikali 10)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--database-url", help="Default: SQLite sementara")
+    parser.add_argument("--history", default=HISTORY_PATH, help="File riwayat JSON")
+    parser.add_argument("--no-save", action="store_true", help="Jangan tambahkan ke riwayat")
+    parser.add_argument("--compare", action="store_true", help="Bandingkan dengan run terakhir di riwayat")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir.name}/microbench.sqlite"
+    try:
+        stages = jalankan(args.number, args.repeat)
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    riwayat = baca_riwayat(args.history)
+    hasil = {"config": {"number": args.number, "repeat": args.repeat, "python": sys.version.split()[0]}, "stages": stages}
+    if not args.no_save:
+        hasil = tambah_riwayat(args.history, hasil)
+    json.dump(hasil, sys.stdout, indent=2)
+    print()
+
+    if args.compare and riwayat:
+        regresi = bandingkan(stages, riwayat[-1]["stages"], args.tolerance)
+        for r in regresi:
+            print(f"REGRESI: {r}", file=sys.stderr)
+        if regresi:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()